@@ -0,0 +1,184 @@
+# analytics.py
+from __future__ import annotations
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+from game import Game, Action, REPLACE, CHOOSE_REPLACE_OR_DISCARD_REVEAL, ROUND_OVER
+from player import COLUMN_MASKS
+from records import GameRecord, Segment, new_game, replay_actions, segment_paths
+
+# Pipeline: decode -> replay -> features -> aggregate, each stage a generator over the
+# previous one, so only the game being replayed is ever held in memory. Shards are
+# whole segment files, which worker processes reduce to one RoundStats each.
+
+
+class Step(NamedTuple):
+    # One replayed action; game is the live Game after the action
+    record: GameRecord
+    game: Game
+    action: Action
+    turn: int            # Turns completed so far, initial reveals excluded
+
+
+class RoundFeatures(NamedTuple):
+    # Summary of one replayed round
+    game_id: int
+    num_players: int
+    scores: list[int]                 # Round score of each seat
+    actions: int                      # Actions played, initial reveals included
+    turns: int                        # Turns played after the initial reveals
+    trigger_seat: Optional[int]       # Seat that revealed its last card first
+    trigger_turn: Optional[int]       # Turn on which that happened
+    triple_columns: int               # Columns eliminated, during play or at scoring
+
+
+def decode(paths: Iterable[Path]) -> Iterator[GameRecord]:
+    # Stage 1: stream records out of memory-mapped segments, one segment at a time
+    for path in paths:
+        with Segment(path) as segment:
+            yield from segment
+
+
+def replay(records: Iterable[GameRecord]) -> Iterator[Step]:
+    # Stage 2: rebuild every position by replaying the records through Game
+    for record in records:
+        game = new_game(record)
+        phase = game.phase
+        turn = 0
+        for game, action in replay_actions(game, record):
+            # A turn ends with a replacement or with the reveal that follows a discard
+            if action.kind == REPLACE or phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+                turn += 1
+            phase = game.phase
+            yield Step(record, game, action, turn)
+
+
+def features(steps: Iterable[Step]) -> Iterator[RoundFeatures]:
+    # Stage 3: fold the steps of each round into one RoundFeatures
+    trigger_seat = trigger_turn = None
+    actions = 0
+    for step in steps:
+        game = step.game
+        actions += 1
+        if trigger_seat is None and game.final_round_triggered:
+            trigger_seat = game.players.index(game.final_round_triggered_by)
+            trigger_turn = step.turn
+        if game.phase != ROUND_OVER:
+            continue
+
+        # Every removed column held a triple (all cells are dealt at the start)
+        triples = sum(1 for player in game.players for mask in COLUMN_MASKS
+                      if player.removed_mask & mask == mask)
+        yield RoundFeatures(step.record.game_id, len(game.players), list(game.round_scores),
+                            actions, step.turn, trigger_seat, trigger_turn, triples)
+        trigger_seat = trigger_turn = None
+        actions = 0
+
+
+class RoundStats:
+    # Mergeable aggregate of RoundFeatures; histograms keep memory bounded
+    def __init__(self):
+        self.rounds = 0
+        self.rounds_with_triples = 0
+        self.triple_columns = 0
+        self.scores_by_seat: dict[int, Counter] = {}    # Seat -> score histogram
+        self.turns = Counter()                           # Round length in turns
+        self.actions = Counter()                         # Round length in actions
+        self.trigger_turns = Counter()                   # Turn the final round started on
+        self.trigger_seats = Counter()
+        self.trigger_wins = 0                            # Trigger seat had the lowest round score
+
+    def add(self, round_features: RoundFeatures):
+        self.rounds += 1
+        self.triple_columns += round_features.triple_columns
+        self.rounds_with_triples += round_features.triple_columns > 0
+        for seat, score in enumerate(round_features.scores):
+            self.scores_by_seat.setdefault(seat, Counter())[score] += 1
+        self.turns[round_features.turns] += 1
+        self.actions[round_features.actions] += 1
+        if round_features.trigger_seat is not None:
+            self.trigger_turns[round_features.trigger_turn] += 1
+            self.trigger_seats[round_features.trigger_seat] += 1
+            scores = round_features.scores
+            self.trigger_wins += scores[round_features.trigger_seat] == min(scores)
+
+    def merge(self, other: RoundStats) -> RoundStats:
+        # Combine the aggregate of another shard into this one
+        self.rounds += other.rounds
+        self.rounds_with_triples += other.rounds_with_triples
+        self.triple_columns += other.triple_columns
+        for seat, counts in other.scores_by_seat.items():
+            self.scores_by_seat.setdefault(seat, Counter()).update(counts)
+        self.turns.update(other.turns)
+        self.actions.update(other.actions)
+        self.trigger_turns.update(other.trigger_turns)
+        self.trigger_seats.update(other.trigger_seats)
+        self.trigger_wins += other.trigger_wins
+        return self
+
+    def summary(self) -> str:
+        # Human-readable report
+        if not self.rounds:
+            return "0 rounds"
+        triggered = sum(self.trigger_seats.values())
+        lines = [
+            f"{self.rounds} rounds",
+            f"triple columns: {self.triple_columns / self.rounds:.3f} per round, "
+            f"{self.rounds_with_triples / self.rounds:.1%} of rounds have one",
+            f"round length: {_mean(self.turns):.2f} turns, {_mean(self.actions):.2f} actions",
+        ]
+        if triggered:
+            lines.append(f"final round triggered on turn {_mean(self.trigger_turns):.2f} on average, "
+                         f"trigger seat wins {self.trigger_wins / triggered:.1%}")
+        for seat, counts in sorted(self.scores_by_seat.items()):
+            lines.append(f"seat {seat}: score {_mean(counts):6.2f}  min {min(counts)}  max {max(counts)}  "
+                         f"triggers {self.trigger_seats[seat] / triggered if triggered else 0:.1%}")
+        return "\n".join(lines)
+
+
+def _mean(counts: Counter) -> float:
+    total = sum(counts.values())
+    return sum(value * n for value, n in counts.items()) / total if total else 0.0
+
+
+def aggregate(rounds: Iterable[RoundFeatures]) -> RoundStats:
+    # Stage 4: reduce the feature stream
+    stats = RoundStats()
+    for round_features in rounds:
+        stats.add(round_features)
+    return stats
+
+
+def analyze_segment(path: Path) -> RoundStats:
+    # Worker entry point: the whole pipeline over one segment file
+    return aggregate(features(replay(decode([path]))))
+
+
+def analyze(source, workers: Optional[int] = None) -> RoundStats:
+    # Run the pipeline over a directory (or list) of segments, one shard per segment
+    # workers=1 runs in-process; None uses one worker per CPU core (a single segment
+    # is always read in-process)
+    paths = segment_paths(source)
+    if workers == 1 or len(paths) <= 1:
+        return aggregate(features(replay(decode(paths))))
+    from multiprocessing import Pool
+    stats = RoundStats()
+    with Pool(processes=workers) as pool:
+        for shard in pool.imap_unordered(analyze_segment, paths):
+            stats.merge(shard)
+    return stats
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Statistics over recorded Skyjo games")
+    parser.add_argument("records", nargs="+", help="segment files or directories of segments")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args(argv)
+
+    paths = [path for source in args.records for path in segment_paths(source)]
+    print(analyze(paths, args.workers).summary())
+
+
+if __name__ == "__main__":
+    main()
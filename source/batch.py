@@ -0,0 +1,188 @@
+# batch.py
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+from deck import CARD_DISTRIBUTION, DECK_SIZE
+from player import GRID_ROWS, GRID_COLS, GRID_SIZE
+from game import INITIAL_REVEALS
+
+# Cards at or below this value are worth keeping for the built-in batch strategy
+DEFAULT_KEEP_THRESHOLD = 3
+
+# Unshuffled deck shared by every game of the batch
+FULL_DECK = np.repeat(np.array(list(CARD_DISTRIBUTION), dtype=np.int8),
+                      list(CARD_DISTRIBUTION.values()))
+# Sentinel lower than any card value, used to ignore cells in max() reductions
+NO_CARD = np.int8(-128)
+
+
+class BatchGame:
+    # N independent Skyjo rounds stored as stacked arrays and advanced in lockstep
+    # Every game is played by the same vectorized greedy strategy: take a low
+    # discard, otherwise draw; replace the worst visible card when the held card
+    # improves it, keep low cards over hidden ones, else discard and reveal.
+
+    def __init__(self, num_games: int, num_players: int = 2, seed: Optional[int] = None,
+                 keep_threshold: int = DEFAULT_KEEP_THRESHOLD):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.keep_threshold = keep_threshold
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        # Shuffle N decks, deal the grids and open the discard piles
+        n, p = self.num_games, self.num_players
+        dealt = p * GRID_SIZE
+
+        self.deck = self.rng.permuted(np.broadcast_to(FULL_DECK, (n, DECK_SIZE)), axis=1)
+        self.grids = self.deck[:, DECK_SIZE - dealt:].reshape(n, p, GRID_SIZE).copy()
+        self.top = np.full(n, DECK_SIZE - dealt - 1, dtype=np.int16)
+
+        # Discard piles are stacks; discard_len - 1 is the index of the visible card
+        self.discard = np.zeros((n, DECK_SIZE), dtype=np.int8)
+        self.discard[:, 0] = self.deck[:, DECK_SIZE - dealt - 1]
+        self.discard_len = np.ones(n, dtype=np.int16)
+
+        # Every player starts with two revealed cards
+        self.revealed = np.zeros((n, p, GRID_SIZE), dtype=bool)
+        self.revealed[:, :, :INITIAL_REVEALS] = True
+        self.removed = np.zeros((n, p, GRID_SIZE), dtype=bool)
+
+        # As in Game, the last player to reveal takes the first turn
+        self.current = np.full(n, p - 1, dtype=np.int8)
+        self.final_round_triggered = np.zeros(n, dtype=bool)
+        self.final_turns_remaining = np.zeros(n, dtype=np.int8)
+        self.finished = np.zeros(n, dtype=bool)
+        self.turns = np.zeros(n, dtype=np.int32)
+        self.scores = np.zeros((n, p), dtype=np.int16)
+
+    def step(self) -> int:
+        # Play one turn in every unfinished game; returns how many were still active
+        idx = np.flatnonzero(~self.finished)
+        m = idx.size
+        if not m:
+            return 0
+        rows = np.arange(m)
+        cp = self.current[idx]
+        threshold = self.keep_threshold
+
+        values = self.grids[idx, cp]
+        revealed = self.revealed[idx, cp]
+        removed = self.removed[idx, cp]
+        hidden = ~revealed & ~removed
+        has_hidden = hidden.any(axis=1)
+        first_hidden = hidden.argmax(axis=1)
+        shown = np.where(revealed & ~removed, values, NO_CARD)
+        worst = shown.argmax(axis=1)
+        worst_value = shown[rows, worst]
+
+        # Pick a pile: low discards are taken, everything else draws from the deck
+        discard_len = self.discard_len[idx]
+        top_discard = self.discard[idx, discard_len - 1]
+        take_discard = top_discard <= threshold
+        discard_len -= take_discard
+
+        draw = np.flatnonzero(~take_discard)
+        empty = draw[self.top[idx[draw]] == 0]
+        if empty.size:
+            self._reshuffle(idx[empty])
+            discard_len[empty] = self.discard_len[idx[empty]]
+        tops = self.top[idx[draw]] - 1
+        self.top[idx[draw]] = tops
+        held = top_discard.copy()
+        held[draw] = self.deck[idx[draw], tops]
+
+        # Replace the worst visible card if the held card beats it,
+        # otherwise put a low card on a hidden cell
+        improves = held < worst_value
+        keep_low = ~improves & (held <= threshold) & has_hidden
+        # Discard and reveal is only open to deck draws when a hidden card is left
+        reveal = ~improves & ~keep_low & ~take_discard & has_hidden
+        replace = ~reveal
+        target = np.where(keep_low, first_hidden, worst)
+
+        # Whatever leaves the turn goes on top of the discard pile
+        outgoing = np.where(replace, values[rows, target], held)
+        self.discard[idx, discard_len] = outgoing
+        discard_len += 1
+
+        rep = np.flatnonzero(replace)
+        values[rep, target[rep]] = held[rep]
+        revealed[rep, target[rep]] = True
+        rev = np.flatnonzero(reveal)
+        revealed[rev, first_hidden[rev]] = True
+
+        # Triple columns on the moved grid go to the bottom of the discard pile
+        self._eliminate_columns(values, revealed, removed, idx, discard_len)
+        self.discard_len[idx] = discard_len
+        self.grids[idx, cp] = values
+        self.revealed[idx, cp] = revealed
+        self.removed[idx, cp] = removed
+        self.turns[idx] += 1
+
+        # Final round bookkeeping, mirroring Game.end_turn / check_end_round
+        triggered = self.final_round_triggered[idx]
+        remaining = self.final_turns_remaining[idx] - triggered
+        newly = ~triggered & (revealed | removed).all(axis=1)
+        remaining[newly] = self.num_players - 1
+        self.final_round_triggered[idx] = triggered | newly
+        self.final_turns_remaining[idx] = remaining
+        done = (triggered | newly) & (remaining <= 0)
+
+        self.current[idx] = (cp + 1) % self.num_players
+        if done.any():
+            self._end_round(idx[done])
+        return m
+
+    def run(self) -> np.ndarray:
+        # Play every game to the end of the round and return the (N, players) scores
+        while self.step():
+            pass
+        return self.scores
+
+    def _reshuffle(self, games: np.ndarray):
+        # Move all but the visible discard back into the deck (rare, so looped per game)
+        for game in games:
+            count = int(self.discard_len[game]) - 1
+            if count <= 0:
+                continue
+            self.deck[game, :count] = self.rng.permutation(self.discard[game, :count])
+            self.discard[game, 0] = self.discard[game, count]
+            self.discard_len[game] = 1
+            self.top[game] = count
+
+    def _eliminate_columns(self, values, revealed, removed, idx, discard_len):
+        # Remove columns of three identical revealed cards from the moved grids
+        v = values.reshape(-1, GRID_ROWS, GRID_COLS)
+        matching = (v[:, 0] == v[:, 1]) & (v[:, 1] == v[:, 2])
+        full = revealed.reshape(-1, GRID_ROWS, GRID_COLS).all(axis=1)
+        eliminated = matching & full & ~removed.reshape(-1, GRID_ROWS, GRID_COLS)[:, 0]
+
+        for col in range(GRID_COLS):
+            games = np.flatnonzero(eliminated[:, col])
+            if not games.size:
+                continue
+            cells = col + GRID_COLS * np.arange(GRID_ROWS)
+            removed[games[:, None], cells] = True
+            revealed[games[:, None], cells] = False
+
+            # Shift each pile up and put the three cards at its bottom, as Game does
+            # (rows hold at most DECK_SIZE cards, so nothing in use falls off the end)
+            g = idx[games]
+            self.discard[g, GRID_ROWS:] = self.discard[g, :-GRID_ROWS]
+            self.discard[g, :GRID_ROWS] = v[games, :, col][:, ::-1]
+            discard_len[games] += GRID_ROWS
+
+    def _end_round(self, games: np.ndarray):
+        # Reveal every card, apply triple columns and score the finished games
+        # (the round is over, so eliminated cards are not moved to the discard pile)
+        self.finished[games] = True
+        removed = self.removed[games]
+        values = self.grids[games]
+        v = values.reshape(-1, self.num_players, GRID_ROWS, GRID_COLS)
+        matching = (v[:, :, 0] == v[:, :, 1]) & (v[:, :, 1] == v[:, :, 2])
+        removed |= np.repeat(matching[:, :, None, :], GRID_ROWS, axis=2).reshape(removed.shape)
+        self.removed[games] = removed
+        self.revealed[games] = ~removed
+        self.scores[games] = np.where(removed, 0, values).sum(axis=2, dtype=np.int16)
@@ -0,0 +1,332 @@
+# benchmark.py
+from __future__ import annotations
+import argparse
+import gc
+import itertools
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from bots import create_bot, expected_value_action, greedy_action
+from deck import Deck
+from game import Game, ROUND_OVER
+from player import Player, GRID_SIZE
+
+# Every workload is seeded from this value, so runs are repeatable
+DEFAULT_SEED = 1234
+# Timed passes per workload; the best one is reported
+DEFAULT_REPEATS = 5
+# Wall-clock length aimed at for a single timed pass, in seconds
+TARGET_PASS_TIME = 0.2
+
+
+# ---------- Workloads ----------
+# Each setup function returns (op, label): op() runs one operation and the label says
+# what an operation is. Setup work is not timed.
+
+def setup_deck_shuffle(seed: int):
+    rng = random.Random(seed)
+    return (lambda: Deck(rng)), "Deck() construction including its shuffle"
+
+
+def setup_deck_draw(seed: int):
+    # Every drawn card is discarded again, so the deck keeps reshuffling its discards
+    deck = Deck(random.Random(seed))
+    draw_card, discard_card = deck.draw_card, deck.discard_card
+
+    def op():
+        discard_card(draw_card())
+    return op, "draw_card + discard_card (reshuffle_discard every ~150 draws)"
+
+
+def setup_round(seed: int):
+    game = Game([create_bot("greedy", "Greedy 1"), create_bot("greedy", "Greedy 2")], seed=seed)
+    game.start_game()
+
+    def op():
+        game.play_round()
+        game.reset_round()
+    return op, "full 2-player round played by greedy bots"
+
+
+def setup_scoring(seed: int):
+    # A finished grid with two triple columns; copied so every operation starts from it
+    template = Player("Scoring")
+    deck = Deck(random.Random(seed))
+    template.setup_grid(deck)
+    for index in range(GRID_SIZE):
+        template.values[index] = index % 2 if index % 4 < 2 else index
+    template.rehash()
+    template.reveal_all_cards()
+    discard_pile = deck.discard_pile
+
+    def op():
+        player = template.copy()
+        player.check_triple_columns(discard_pile)
+        player.calculate_score()
+        discard_pile.clear()
+    return op, "Player.copy + check_triple_columns + calculate_score"
+
+
+def _midgame(seed: int, num_players: int = 2, actions: int = 30) -> Game:
+    # A game a few turns into the round, played by the card-counting bot
+    game = Game([create_bot("ev", f"EV {i + 1}") for i in range(num_players)], seed=seed)
+    game.start_game()
+    for _ in range(actions):
+        game.apply_action(game.get_current_player().choose_action(game))
+    return game
+
+
+def setup_ev_decision(seed: int):
+    game = _midgame(seed)
+    player = game.get_current_player()
+    return (lambda: expected_value_action(player, game)), "expected_value_action decision"
+
+
+def setup_make_unmake(seed: int):
+    # Depth-2 search tree walked with reversible moves
+    game = _midgame(seed)
+
+    def op():
+        for action in game.legal_actions():
+            game.make_move(action)
+            if game.phase != ROUND_OVER:
+                for reply in game.legal_actions():
+                    game.make_move(reply)
+                    game.unmake_move()
+            game.unmake_move()
+    return op, "depth-2 make_move/unmake_move walk"
+
+
+def setup_copy(seed: int):
+    game = _midgame(seed)
+    return game.copy, "Game.copy for search"
+
+
+def setup_vector_env(seed: int):
+    from env import VectorEnv
+    env = VectorEnv(1024, 2, seed=seed)
+    env.reset()
+    return (lambda: env.step(env.sample_actions())), "VectorEnv.step over 1024 environments (random legal actions)"
+
+
+class _FakeCanvas:
+    # Minimal stand-in for tk.Canvas: hands out item ids and counts calls
+    def __init__(self, *args, **kwargs):
+        self.ids = itertools.count(1)
+        self.calls = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+        return next(self.ids)
+
+    create_rectangle = create_text = itemconfigure = coords = _call
+
+    def pack(self, **kwargs):
+        pass
+
+    def tag_bind(self, *args):
+        pass
+
+
+class _FakeWidget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+    def pack_forget(self):
+        pass
+
+    def config(self, **kwargs):
+        pass
+
+
+def setup_render(seed: int):
+    # GameWindow.draw_board with Tk mocked out (no display needed); the board changes
+    # between renders so the retained items really get reconfigured
+    import tkinter as tk
+    from contextlib import ExitStack
+    from unittest import mock
+    with ExitStack() as patches:
+        patches.enter_context(mock.patch.object(tk.Tk, "__init__", lambda self: None))
+        for method in ("title", "protocol"):
+            patches.enter_context(mock.patch.object(tk.Tk, method, lambda self, *args: None))
+        patches.enter_context(mock.patch.object(tk, "Canvas", _FakeCanvas))
+        patches.enter_context(mock.patch.object(tk, "Label", _FakeWidget))
+        patches.enter_context(mock.patch.object(tk, "Button", _FakeWidget))
+        from gui import GameWindow
+        game = Game(["Alice", "Bob"], seed=seed)
+        game.start_game()
+        window = GameWindow(game)
+
+    renders = itertools.count()
+
+    def op():
+        if game.phase == ROUND_OVER:
+            game.reset_round()
+        elif next(renders) % 2:
+            game.apply_action(greedy_action(game.get_current_player(), game))
+        window.draw_board()
+    return op, "GameWindow.draw_board with mocked Tk (a move every other render)"
+
+
+WORKLOADS: dict[str, Callable] = {
+    "deck_shuffle": setup_deck_shuffle,
+    "deck_draw": setup_deck_draw,
+    "round": setup_round,
+    "scoring": setup_scoring,
+    "ev_decision": setup_ev_decision,
+    "make_unmake": setup_make_unmake,
+    "game_copy": setup_copy,
+    "vector_env": setup_vector_env,
+    "render": setup_render,
+}
+
+
+# ---------- Measurement ----------
+
+def _calibrate(op: Callable[[], object]) -> int:
+    # Number of operations that takes about TARGET_PASS_TIME
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_PASS_TIME / 10 or iterations >= 1 << 24:
+            return max(1, int(iterations * TARGET_PASS_TIME / max(elapsed, 1e-9)))
+        iterations *= 10
+
+
+def measure(name: str, seed: int = DEFAULT_SEED, repeats: int = DEFAULT_REPEATS,
+            iterations: Optional[int] = None) -> dict:
+    # Time one workload (best of repeats), then measure its memory in a separate pass:
+    # the peak traced while it runs, and the blocks and bytes still alive afterwards.
+    # Neither counts short-lived allocations (an object made and freed within an op
+    # leaves no trace); CPython exposes no allocation counter, only live blocks.
+    # Every pass starts from a workload freshly built from its seed, so with a fixed
+    # iteration count all passes, on any machine, run exactly the same operations.
+    setup = WORKLOADS[name]
+    op, label = setup(seed)
+    iterations = iterations or _calibrate(op)
+
+    timings = []
+    for _ in range(repeats):
+        op, _ = setup(seed)
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    # tracemalloc slows everything down, so memory is measured on its own pass
+    op, _ = setup(seed)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(iterations):
+        op()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    retained = sum(stat.size_diff for stat in diff)
+    retained_blocks = sum(stat.count_diff for stat in diff)
+
+    return {
+        "description": label,
+        "iterations": iterations,
+        "repeats": repeats,
+        "ops_per_sec": iterations / best,
+        "mean_us": best / iterations * 1e6,
+        "spread_pct": 100 * (max(timings) - best) / best,   # Slowest pass vs best pass
+        "peak_alloc_bytes": peak,
+        "retained_bytes": retained,
+        "retained_blocks_per_op": retained_blocks / iterations,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names: Optional[list[str]] = None, seed: int = DEFAULT_SEED,
+                   repeats: int = DEFAULT_REPEATS, iterations: Optional[dict[str, int]] = None) -> dict:
+    # Run the selected workloads (all by default) and return a JSON-ready report;
+    # iterations fixes the operation count of some workloads, the others are calibrated
+    import platform
+    results = {}
+    for name in names or WORKLOADS:
+        results[name] = measure(name, seed, repeats, (iterations or {}).get(name))
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    # Table of results, with the speed-up against a baseline report when given
+    lines = [f"commit {report['commit'] or '?'}  python {report['python']}  seed {report['seed']}"]
+    for name, result in report["results"].items():
+        line = (f"{name:<13} {result['ops_per_sec']:>12,.0f} ops/s  {result['mean_us']:>10.2f} µs  "
+                f"peak {result['peak_alloc_bytes'] / 1024:>8.1f} KiB  "
+                f"{result['retained_blocks_per_op']:>+8.2f} retained blocks/op")
+        old = (baseline or {}).get("results", {}).get(name)
+        if old:
+            line += f"  x{result['ops_per_sec'] / old['ops_per_sec']:.2f} vs {baseline.get('commit') or 'baseline'}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the Skyjo hot paths")
+    parser.add_argument("workloads", nargs="*", metavar="WORKLOAD",
+                        help=f"workloads to run, among {', '.join(WORKLOADS)} (default: all)")
+    parser.add_argument("-s", "--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("-r", "--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    parser.add_argument("-i", "--iterations", type=int, default=None,
+                        help="operations per pass for every workload (default: calibrated, "
+                             "or the counts of the --compare run)")
+    parser.add_argument("-c", "--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.workloads) - set(WORKLOADS))
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+    if args.iterations is not None and args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    # Exact comparisons: the same operations as the baseline run, unless told otherwise
+    if args.iterations is not None:
+        iterations = dict.fromkeys(args.workloads or WORKLOADS, args.iterations)
+    elif baseline is not None:
+        iterations = {name: result["iterations"] for name, result in baseline.get("results", {}).items()}
+    else:
+        iterations = None
+    report = run_benchmarks(args.workloads, args.seed, args.repeats, iterations)
+    print(format_report(report, baseline))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# bots.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import Callable, Iterable
+from deck import MIN_CARD_VALUE
+from player import Player, GRID_ROWS, GRID_COLS, GRID_SIZE
+from game import (
+    Game, Action, DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION,
+    REVEAL_ACTIONS, REPLACE_ACTIONS,
+    INITIAL_REVEAL, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_OR_DISCARD_REVEAL
+)
+
+# Cards at or below this value are worth keeping (same default as BatchGame)
+DEFAULT_KEEP_THRESHOLD = 3
+
+
+class BotPlayer(Player):
+    # Computer-controlled player: picks its own actions from the game state
+    def choose_action(self, game: Game) -> Action:
+        raise NotImplementedError
+
+
+class RandomPlayer(BotPlayer):
+    def choose_action(self, game: Game) -> Action:
+        # Pick uniformly among the legal actions using the game's seeded generator
+        return game.rng.choice(game.legal_actions())
+
+
+def greedy_action(player: Player, game: Game, keep_threshold: int = DEFAULT_KEEP_THRESHOLD) -> Action:
+    # Scalar version of the BatchGame strategy: take a low discard, otherwise draw;
+    # replace the highest visible card when the held card beats it, keep low cards
+    # over hidden ones, else discard and reveal (also used as a search rollout policy)
+    phase = game.phase
+    if phase == INITIAL_REVEAL or phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+        return REVEAL_ACTIONS[player.first_hidden_index()]
+
+    if phase == CHOOSE_PILE:
+        discard_pile = game.discard_pile
+        if discard_pile and discard_pile[-1] <= keep_threshold:
+            return DRAW_DISCARD_ACTION
+        return DRAW_DECK_ACTION if game.deck.top or len(discard_pile) > 1 else DRAW_DISCARD_ACTION
+
+    held = player.held_value
+    highest = player.highest_revealed_index()
+    hidden = player.first_hidden_index()
+    if highest >= 0 and held < player.values[highest]:
+        return REPLACE_ACTIONS[highest]
+    if hidden >= 0 and held <= keep_threshold:
+        return REPLACE_ACTIONS[hidden]
+    if hidden >= 0 and phase == CHOOSE_REPLACE_OR_DISCARD:
+        return DISCARD_ACTION
+    return REPLACE_ACTIONS[highest if highest >= 0 else hidden]
+
+
+class GreedyPlayer(BotPlayer):
+    def __init__(self, name: str, keep_threshold: int = DEFAULT_KEEP_THRESHOLD):
+        super().__init__(name)
+        self.keep_threshold = keep_threshold
+
+    def choose_action(self, game: Game) -> Action:
+        return greedy_action(self, game, self.keep_threshold)
+
+
+# Cell codes of a grid signature besides face-up card values
+HIDDEN_CELL = 100
+REMOVED_CELL = 101
+# Size of the memo of per-decision EV tables
+EV_TABLE_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=EV_TABLE_CACHE_SIZE)
+def ev_table(signature: tuple[int, ...], unseen: tuple[int, ...]) -> tuple:
+    # Best move for every card value the player could hold, keyed by grid signature and
+    # unseen-card histogram. A hidden card counts as the mean unseen value; putting a
+    # card on a column whose two other cards match it removes the whole column.
+    # Returns (replace, best, deck_ev):
+    #   replace[v] = (score change, cell) of the best replacement when holding v
+    #   best[v]    = same but may be (0, -1) for "discard and reveal"
+    #   deck_ev    = expected score change of drawing from the deck and playing best
+    total = sum(unseen)
+    mean = sum((MIN_CARD_VALUE + i) * n for i, n in enumerate(unseen)) / total if total else 0.0
+    has_hidden = HIDDEN_CELL in signature
+
+    # Without a triple, the best cell to replace is the one with the highest (expected) value
+    # Cells whose two column-mates are face-up and equal complete a triple for that value
+    highest = (float("-inf"), -1)
+    triples: dict[int, tuple[float, int]] = {}
+    for index, code in enumerate(signature):
+        if code == REMOVED_CELL:
+            continue
+        old = mean if code == HIDDEN_CELL else code
+        if old > highest[0]:
+            highest = (old, index)
+        col = index % GRID_COLS
+        a, b = (signature[col + r * GRID_COLS] for r in range(GRID_ROWS) if col + r * GRID_COLS != index)
+        if a == b and a < HIDDEN_CELL and old > triples.get(a, (float("-inf"),))[0]:
+            triples[a] = (old, index)
+
+    replace, best = [], []
+    for held in range(MIN_CARD_VALUE, MIN_CARD_VALUE + len(unseen)):
+        choice = (held - highest[0], highest[1])
+        if held in triples:
+            old, index = triples[held]
+            if -(old + 2 * held) < choice[0]:
+                choice = (-(old + 2 * held), index)   # Column of three is eliminated
+        replace.append(choice)
+        best.append(choice if not has_hidden or choice[0] < 0 else (0, -1))
+
+    deck_ev = sum(n * best[i][0] for i, n in enumerate(unseen)) / total if total else 0.0
+    return tuple(replace), tuple(best), deck_ev
+
+
+def grid_signature(player: Player) -> tuple[int, ...]:
+    # Face-up values, HIDDEN_CELL or REMOVED_CELL for each cell, row-major
+    revealed, removed, values = player.revealed_mask, player.removed_mask, player.values
+    return tuple(REMOVED_CELL if removed >> i & 1 else
+                 values[i] if revealed >> i & 1 else HIDDEN_CELL
+                 for i in range(GRID_SIZE))
+
+
+def expected_value_action(player: Player, game: Game) -> Action:
+    # Card-counting policy: scores every option by its expected effect on the grid, using
+    # the exact distribution of unseen cards kept incrementally by Game.unseen
+    phase = game.phase
+    if phase == INITIAL_REVEAL or phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+        return REVEAL_ACTIONS[player.first_hidden_index()]
+    if game.final_round_triggered:
+        # Last turn of the round: solved exactly (imported lazily, it builds on this module)
+        from endgame import final_turn_action
+        return final_turn_action(player, game)
+
+    replace, best, deck_ev = ev_table(grid_signature(player), tuple(game.unseen))
+    if phase == CHOOSE_PILE:
+        discard_pile = game.discard_pile
+        can_draw = game.deck.top or len(discard_pile) > 1
+        if discard_pile and (not can_draw or
+                             replace[discard_pile[-1] - MIN_CARD_VALUE][0] < deck_ev):
+            return DRAW_DISCARD_ACTION
+        return DRAW_DECK_ACTION
+
+    held = player.held_value - MIN_CARD_VALUE
+    table = best if phase == CHOOSE_REPLACE_OR_DISCARD else replace
+    cell = table[held][1]
+    return DISCARD_ACTION if cell < 0 else REPLACE_ACTIONS[cell]
+
+
+class ExpectedValuePlayer(BotPlayer):
+    def choose_action(self, game: Game) -> Action:
+        return expected_value_action(self, game)
+
+
+def _monte_carlo_player(name: str) -> BotPlayer:
+    # Imported lazily: the search module builds on this one
+    from mcts import MonteCarloPlayer
+    return MonteCarloPlayer(name)
+
+
+# Bot factories by name, used by the tournament runner and command-line tools
+BOTS: dict[str, Callable[[str], BotPlayer]] = {
+    "random": RandomPlayer,
+    "greedy": GreedyPlayer,
+    "ev": ExpectedValuePlayer,
+    "mcts": _monte_carlo_player,
+}
+
+
+def validate_strategies(strategies: Iterable[str]):
+    # Raise ValueError on the first name that is not a registered bot strategy
+    for strategy in strategies:
+        if strategy not in BOTS:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {sorted(BOTS)}")
+
+
+def create_bot(strategy: str, name: str | None = None) -> BotPlayer:
+    # Instantiate a registered bot strategy
+    validate_strategies((strategy,))
+    return BOTS[strategy](name or strategy)
@@ -1,6 +1,11 @@
 # card.py
+from typing import Optional
+
 
 class Card:
+    # Slots: no per-instance __dict__, a Card is just a value and a face-up flag
+    __slots__ = ("value", "revealed")
+
     def __init__(self, value: int):
         # Store the card's numeric value and whether it is currently revealed
         self.value = value
@@ -17,3 +22,32 @@ class Card:
     def __repr__(self):
         # String representation: show the value if revealed, otherwise "?"
         return f"[{self.value if self.revealed else '?'}]"
+
+
+class CardView(Card):
+    # Immutable Card shared by every caller that asks for the same (value, face) pair:
+    # the game state lives in plain ints, so views need not be allocated per request
+    __slots__ = ()
+
+    def __init__(self, value: int, revealed: bool):
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "revealed", revealed)
+
+    def __setattr__(self, name: str, value):
+        # Views are read-only (reveal() and hide() included): the state they show is elsewhere
+        raise AttributeError(f"card views are read-only, cannot set {name!r}")
+
+
+# Flyweight pool of views, filled on first use: (value, revealed) -> CardView
+_VIEWS: dict[tuple[int, bool], CardView] = {}
+
+
+def card_view(value: Optional[int], revealed: bool = True) -> Optional[CardView]:
+    # Shared read-only Card showing value (None for no card)
+    if value is None:
+        return None
+    key = (value, revealed)
+    view = _VIEWS.get(key)
+    if view is None:
+        view = _VIEWS[key] = CardView(value, revealed)
+    return view
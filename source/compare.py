@@ -0,0 +1,267 @@
+# compare.py
+from __future__ import annotations
+import argparse
+import itertools
+import math
+import os
+from collections import deque
+from statistics import NormalDist
+from typing import Iterable, Iterator, Optional
+from bots import BOTS, create_bot, validate_strategies
+from game import Game
+from tournament import game_seed
+
+# Head-to-head comparison of two strategies that plays only as many games as it needs.
+# Games come in pairs sharing one seed (common random numbers: same shuffle, same deals)
+# with the seats swapped, so the luck of the cards mostly cancels within a pair. After
+# every batch of pairs, a sequential test per metric decides whether A is better, B is
+# better, or the two are within the margin of each other, at error rates alpha and beta.
+
+# Error rates of each test: alpha = deciding on a difference that is not there,
+# beta = missing a difference of the full margin
+DEFAULT_ALPHA = 0.05
+DEFAULT_BETA = 0.05
+# Smallest differences worth detecting: round score points, and win rate above 50%
+DEFAULT_SCORE_MARGIN = 1.0
+DEFAULT_WIN_MARGIN = 0.03
+# Pairs played between two looks at the tests
+DEFAULT_BATCH_PAIRS = 100
+DEFAULT_MAX_GAMES = 200_000
+# Variance floor: identical deterministic strategies tie every pair exactly
+MIN_VARIANCE = 1e-9
+
+# Outcomes of a test, from the point of view of strategy A
+A_BETTER = "A better"
+B_BETTER = "B better"
+EQUIVALENT = "equivalent"
+
+
+def play_pair(strategy_a: str, strategy_b: str, base_seed: int, pair_id: int) -> tuple[float, float, int, int]:
+    # Play the two games of a pair; returns (score lead of A, win score of A in [0, 1])
+    # averaged over both games, plus A's lead in each game
+    seed = game_seed(base_seed, pair_id)
+    leads = []
+    for swapped in (False, True):
+        bots = [create_bot(strategy_a, f"{strategy_a}#0"), create_bot(strategy_b, f"{strategy_b}#1")]
+        if swapped:
+            bots.reverse()
+        game = Game(bots, seed=seed)
+        game.start_game()
+        scores = game.play_round()
+        score_a, score_b = scores[::-1] if swapped else scores
+        leads.append(score_b - score_a)
+    wins = sum(1.0 if lead > 0 else 0.5 if lead == 0 else 0.0 for lead in leads)
+    return (leads[0] + leads[1]) / 2, wins / 2, leads[0], leads[1]
+
+
+def play_batch(task: tuple) -> list[tuple[float, float, int, int]]:
+    # Worker entry point: play pairs [start, stop)
+    strategy_a, strategy_b, base_seed, start, stop = task
+    return [play_pair(strategy_a, strategy_b, base_seed, pair_id) for pair_id in range(start, stop)]
+
+
+class SequentialTest:
+    # Three-way sequential test on the mean of paired observations (Sobel-Wald): two
+    # SPRTs of mean = center against center + margin and center - margin. The log
+    # likelihood ratios use a normal model with the variance estimated from the data
+    # (the GSPRT approximation), so any per-pair metric can be tested.
+    def __init__(self, name: str, center: float, margin: float,
+                 alpha: float = DEFAULT_ALPHA, beta: float = DEFAULT_BETA):
+        self.name = name
+        self.center = center
+        self.margin = margin
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1 - alpha))     # Accept "no difference" at or below
+        self.upper = math.log((1 - beta) / alpha)     # Accept "difference" at or above
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.outcome: Optional[str] = None               # Decision, frozen once reached
+
+    def add(self, value: float):
+        # Data after the decision is ignored: the error rates hold at the first crossing
+        if self.outcome is not None:
+            return
+        self.n += 1
+        self.total += value
+        self.squares += value * value
+
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def variance(self) -> float:
+        if self.n < 2:
+            return 0.0
+        mean = self.mean()
+        return max((self.squares - self.n * mean * mean) / (self.n - 1), 0.0)
+
+    def llr(self, alternative: float) -> float:
+        # Log-likelihood ratio of mean = alternative against mean = center
+        variance = max(self.variance(), MIN_VARIANCE)
+        return (self.n * (alternative - self.center) * (2 * self.mean() - self.center - alternative)
+                / (2 * variance))
+
+    def decision(self) -> Optional[str]:
+        # A_BETTER, B_BETTER or EQUIVALENT once decided, None while undecided. Each call
+        # is a look at the data; the first boundary crossed is recorded for good.
+        if self.outcome is not None or self.n < 2:
+            return self.outcome
+        above = self.llr(self.center + self.margin)
+        below = self.llr(self.center - self.margin)
+        if above >= self.upper:
+            self.outcome = A_BETTER
+        elif below >= self.upper:
+            self.outcome = B_BETTER
+        elif above <= self.lower and below <= self.lower:
+            self.outcome = EQUIVALENT
+        return self.outcome
+
+    def interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        # Normal confidence interval of the mean (indicative: the stopping rule widens it)
+        half = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(self.variance() / self.n) if self.n else math.inf
+        return self.mean() - half, self.mean() + half
+
+    def fixed_size(self) -> int:
+        # Pairs a fixed-size test with the same error rates and margin would need,
+        # at the variance observed so far
+        z = NormalDist().inv_cdf
+        return math.ceil(((z(1 - self.alpha) + z(1 - self.beta)) / self.margin) ** 2 * self.variance())
+
+
+class Comparison:
+    # Running state of a comparison: the sequential tests plus the per-game score leads
+    # (to measure how much pairing on shared seeds reduced the variance)
+    def __init__(self, strategy_a: str, strategy_b: str, tests: list[SequentialTest]):
+        self.strategies = (strategy_a, strategy_b)
+        self.tests = tests
+        self.pairs = 0
+        self.lead_sum = 0
+        self.lead_squares = 0
+
+    @property
+    def games(self) -> int:
+        return 2 * self.pairs
+
+    def add(self, pair: tuple[float, float, int, int]):
+        lead, wins, first, second = pair
+        self.pairs += 1
+        for test in self.tests:
+            test.add(lead if test.name == "score" else wins)
+        self.lead_sum += first + second
+        self.lead_squares += first * first + second * second
+
+    def decided(self) -> bool:
+        # Look at every test (recording any new decision), then check all are decided
+        return all([test.decision() is not None for test in self.tests])
+
+    def pairing_gain(self) -> float:
+        # Variance of the mean lead of two independent games over that of a pair
+        games = self.games
+        if games < 2 or self.pairs < 2:
+            return 1.0
+        mean = self.lead_sum / games
+        unpaired = (self.lead_squares - games * mean * mean) / (games - 1) / 2
+        paired = next(test for test in self.tests if test.name == "score").variance()
+        return unpaired / paired if paired else math.inf
+
+    def summary(self) -> str:
+        strategy_a, strategy_b = self.strategies
+        lines = [f"A = {strategy_a}, B = {strategy_b}: {self.games} games "
+                 f"({self.pairs} pairs sharing a seed, seats swapped)"]
+        for test in self.tests:
+            low, high = test.interval()
+            if test.name == "score":
+                label = f"score lead of A {test.mean():+.2f} points/round [{low:+.2f}, {high:+.2f}]"
+            else:
+                label = f"win rate of A {test.mean():.1%} [{low:.1%}, {high:.1%}]"
+            fixed = 2 * test.fixed_size()
+            lines.append(f"  {label}: {test.decision() or 'undecided'} after {2 * test.n} games "
+                         f"(fixed-size test: ~{fixed} games)")
+        if any(test.name == "score" for test in self.tests):
+            gain = self.pairing_gain()
+            lines.append(f"  shared seeds cut the score variance {gain:.1f}x" if gain < math.inf else
+                         "  shared seeds made every pair an exact tie")
+        return "\n".join(lines)
+
+
+def _ordered(tasks: Iterable[tuple], workers: Optional[int]) -> Iterator[list]:
+    # Results of play_batch in task order from a process pool, keeping a few batches in
+    # flight; closing the generator cancels the rest
+    from concurrent.futures import ProcessPoolExecutor
+    window = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(play_batch, task))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def compare(strategy_a: str, strategy_b: str, base_seed: int = 0,
+            metrics: Iterable[str] = ("score", "wins"),
+            alpha: float = DEFAULT_ALPHA, beta: float = DEFAULT_BETA,
+            score_margin: float = DEFAULT_SCORE_MARGIN, win_margin: float = DEFAULT_WIN_MARGIN,
+            batch_pairs: int = DEFAULT_BATCH_PAIRS, max_games: int = DEFAULT_MAX_GAMES,
+            workers: Optional[int] = 1) -> Comparison:
+    # Play pairs of games in batches until every test has decided, or max_games.
+    # Batches are folded in order, so the result does not depend on the worker count.
+    # workers=1 plays in-process; None uses one worker per CPU core
+    validate_strategies((strategy_a, strategy_b))
+    tests = []
+    for metric in metrics:
+        if metric == "score":
+            tests.append(SequentialTest("score", 0.0, score_margin, alpha, beta))
+        elif metric == "wins":
+            tests.append(SequentialTest("wins", 0.5, win_margin, alpha, beta))
+        else:
+            raise ValueError(f"Unknown metric {metric!r}, expected 'score' or 'wins'")
+
+    comparison = Comparison(strategy_a, strategy_b, tests)
+    tasks = ((strategy_a, strategy_b, base_seed, start, start + batch_pairs)
+             for start in itertools.count(0, batch_pairs))
+    results = map(play_batch, tasks) if workers == 1 else _ordered(tasks, workers)
+    try:
+        for batch in results:
+            for pair in batch:
+                comparison.add(pair)
+            if comparison.decided() or comparison.games >= max_games:
+                break
+    finally:
+        if workers != 1:
+            results.close()
+    return comparison
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(
+        prog=prog, description="Compare two Skyjo strategies, stopping as soon as the result is significant")
+    parser.add_argument("strategy_a", choices=sorted(BOTS))
+    parser.add_argument("strategy_b", choices=sorted(BOTS))
+    parser.add_argument("-s", "--seed", type=int, default=0, help="base seed")
+    parser.add_argument("--metric", choices=("score", "wins", "both"), default="both",
+                        help="what to test: mean score lead, win rate, or both (default)")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="false difference rate")
+    parser.add_argument("--beta", type=float, default=DEFAULT_BETA, help="missed difference rate")
+    parser.add_argument("--score-margin", type=float, default=DEFAULT_SCORE_MARGIN,
+                        help="smallest score difference per round worth detecting")
+    parser.add_argument("--win-margin", type=float, default=DEFAULT_WIN_MARGIN,
+                        help="smallest win rate difference from 50%% worth detecting")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_PAIRS, help="pairs per batch")
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES)
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (0: one per core)")
+    args = parser.parse_args(argv)
+
+    metrics = ("score", "wins") if args.metric == "both" else (args.metric,)
+    comparison = compare(args.strategy_a, args.strategy_b, args.seed, metrics, args.alpha, args.beta,
+                         args.score_margin, args.win_margin, args.batch, args.max_games,
+                         args.workers or None)
+    print(comparison.summary())
+
+
+if __name__ == "__main__":
+    main()
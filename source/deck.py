@@ -1,53 +1,283 @@
 # deck.py
 import random
-from card import Card
+from array import array
+from typing import Iterator, Optional
+from card import Card, card_view
+
+# Official Skyjo card distribution: card value -> number of copies
+CARD_DISTRIBUTION = {
+    -2: 5, -1: 10, 0: 15, 1: 10, 2: 10, 3: 10,
+    4: 10, 5: 10, 6: 10, 7: 10, 8: 10, 9: 10,
+    10: 10, 11: 10, 12: 10
+}
+DECK_SIZE = sum(CARD_DISTRIBUTION.values())
+MIN_CARD_VALUE = min(CARD_DISTRIBUTION)
+# Number of copies of each card value, indexed by value - MIN_CARD_VALUE
+CARD_COUNTS = [CARD_DISTRIBUTION[value] for value in range(MIN_CARD_VALUE, max(CARD_DISTRIBUTION) + 1)]
+# Card values of a fresh, unshuffled deck
+UNSHUFFLED_VALUES = array("b", [value for value, count in CARD_DISTRIBUTION.items()
+                                for _ in range(count)])
+# Kinds of undo journal entries (see Game.make_move)
+UNDO_APPEND = 0
+UNDO_APPENDLEFT = 1
+UNDO_POP = 2
+UNDO_DRAW = 3
+UNDO_RESHUFFLE = 4
+# Zobrist key of each possible visible discard, indexed by value - MIN_CARD_VALUE
+_zobrist_rng = random.Random(0xD15CA2D)
+DISCARD_TOP_KEYS = [_zobrist_rng.getrandbits(64) for _ in CARD_COUNTS]
+
+
+class DiscardPile:
+    # Double-ended stack of card values with constant-time pushes at both ends
+    # Values live in buffer[head:tail]; the last one is the visible card.
+    # Snapshots share the buffer, which is copied on the first write after one.
+    # While journal is set (Game.make_move), every push and pop logs its inverse there.
+    journal: Optional[list] = None
 
-class Deck:
     def __init__(self):
-        # Create the full deck and the discard pile
-        self.cards = []
-        self.discard_pile = []
+        self.buffer = array("b", bytes(2 * DECK_SIZE))
+        self.head = self.tail = DECK_SIZE
+        self.shared = False
+
+    def _own_buffer(self):
+        # Copy-on-write: stop sharing the buffer with a snapshot before mutating it
+        if self.shared:
+            self.buffer = array("b", self.buffer)
+            self.shared = False
+
+    def _recenter(self):
+        # Move the values back to the middle when one end of the buffer is reached
+        values = self.buffer[self.head:self.tail]
+        self.buffer = array("b", bytes(2 * DECK_SIZE))
+        self.head = DECK_SIZE - len(values) // 2
+        self.tail = self.head + len(values)
+        self.buffer[self.head:self.tail] = values
+        self.shared = False
+
+    def append(self, value: int):
+        # Put a card on top of the pile (visible)
+        if self.journal is not None:
+            self.journal.append((self, UNDO_APPEND))
+        self._own_buffer()
+        if self.tail == len(self.buffer):
+            self._recenter()
+        self.buffer[self.tail] = value
+        self.tail += 1
+
+    def appendleft(self, value: int):
+        # Slide a card underneath the whole pile
+        if self.journal is not None:
+            self.journal.append((self, UNDO_APPENDLEFT))
+        self._own_buffer()
+        if self.head == 0:
+            self._recenter()
+        self.head -= 1
+        self.buffer[self.head] = value
+
+    def pop(self) -> int:
+        # Take the visible card off the pile
+        if self.tail == self.head:
+            raise IndexError("pop from empty discard pile")
+        self.tail -= 1
+        value = self.buffer[self.tail]
+        if self.journal is not None:
+            self.journal.append((self, UNDO_POP, value))
+        return value
+
+    def undo(self, entry: tuple):
+        # Take back one journaled push or pop
+        if entry[1] == UNDO_APPEND:
+            self.tail -= 1
+        elif entry[1] == UNDO_APPENDLEFT:
+            self.head += 1
+        else:
+            self.append(entry[2])
+
+    def load(self, values: bytes):
+        # Replace the whole pile by the given values (bottom first)
+        self.clear()
+        self._own_buffer()
+        self.buffer[self.head:self.head + len(values)] = array("b", values)
+        self.tail = self.head + len(values)
+
+    def clear(self):
+        self.head = self.tail = DECK_SIZE
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def __getitem__(self, index: int) -> int:
+        length = self.tail - self.head
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("discard pile index out of range")
+        return self.buffer[self.head + index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.buffer[self.head:self.tail])
+
+    def snapshot(self) -> tuple:
+        # O(1) snapshot: share the buffer and remember the bounds
+        self.shared = True
+        return self.buffer, self.head, self.tail
+
+    def restore(self, state: tuple):
+        # Return to a snapshot; the buffer stays shared so it can be restored again
+        self.buffer, self.head, self.tail = state
+        self.shared = True
+
+    def copy(self) -> "DiscardPile":
+        # Copy sharing the buffer until either side writes to it
+        clone = DiscardPile.__new__(DiscardPile)
+        clone.buffer, clone.head, clone.tail = self.snapshot()
+        clone.shared = True
+        return clone
+
+    def __repr__(self) -> str:
+        return f"DiscardPile({list(self)})"
+
+
+class Deck:
+    # While journal is set (Game.make_move), draws and reshuffles log their inverse there
+    journal: Optional[list] = None
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        # Random generator used for every shuffle, so games can be reproduced
+        self.rng = rng if rng is not None else random.Random()
+        # The draw pile is a preallocated int8 array of card values;
+        # cards are drawn from index top - 1 downwards
+        self.values = array("b", bytes(DECK_SIZE))
+        self.values_shared = False   # True while a snapshot references self.values
+        self.top = 0
+        self.reshuffles = 0          # Number of times the discard pile went back into the deck
+        # Face-up discard pile of card values, last item is the visible card
+        self.discard_pile = DiscardPile()
         self._generate_deck()
         self.shuffle()
 
+    def _own_values(self):
+        # Copy-on-write: stop sharing the draw pile with a snapshot before mutating it
+        if self.values_shared:
+            self.values = array("b", self.values)
+            self.values_shared = False
+
     def _generate_deck(self):
-        # Generate the official Skyjo deck based on card distribution
-        distribution = {
-            -2: 5, -1: 10, 0: 15, 1: 10, 2: 10, 3: 10,
-            4: 10, 5: 10, 6: 10, 7: 10, 8: 10, 9: 10,
-            10: 10, 11: 10, 12: 10
-        }
-        # Create card instances according to distribution
-        for value, count in distribution.items():
-            self.cards.extend([Card(value) for _ in range(count)])
+        # Fill the draw pile according to the official distribution
+        self._own_values()
+        self.values[:] = UNSHUFFLED_VALUES
+        self.top = DECK_SIZE
+
+    def reset(self):
+        # Gather every card back and reshuffle, reusing the existing arrays
+        self.discard_pile.clear()
+        self.reshuffles = 0
+        self._generate_deck()
+        self.shuffle()
+
+    @property
+    def cards(self) -> list[Card]:
+        # Face-down Card views of the remaining draw pile (bottom first)
+        return [card_view(value, False) for value in self.values[:self.top]]
 
     def shuffle(self):
-        # Shuffle the main deck
-        random.shuffle(self.cards)
+        # Shuffle the remaining draw pile in place
+        self._own_values()
+        self.rng.shuffle(memoryview(self.values)[:self.top])
 
-    def draw_card(self):
-        # Draw the top card of the deck
+    def draw_value(self) -> Optional[int]:
+        # Draw the value of the top card of the deck
         # If the deck is empty, the discard pile is reshuffled back into the deck
-        if not self.cards:
+        if not self.top:
             self.reshuffle_discard()
-        # Return a card only if deck has cards after reshuffling
-        if self.cards:
-            return self.cards.pop()
+        # Return a value only if deck has cards after reshuffling
+        if self.top:
+            self.top -= 1
+            if self.journal is not None:
+                self.journal.append((self, UNDO_DRAW))
+            return self.values[self.top]
         return None
 
-    def top_discard(self):
+    def draw_card(self) -> Optional[Card]:
+        # Draw the top card of the deck as a shared face-down view
+        return card_view(self.draw_value(), False)
+
+    @property
+    def zobrist(self) -> int:
+        # Hash of the public deck state: the visible discard (the draw pile is face-down)
+        pile = self.discard_pile
+        return DISCARD_TOP_KEYS[pile[-1] - MIN_CARD_VALUE] if pile else 0
+
+    def top_discard(self) -> Optional[Card]:
         # Get the top card of the discard pile without removing it
-        return self.discard_pile[-1] if self.discard_pile else None
+        return card_view(self.discard_pile[-1]) if self.discard_pile else None
 
     def discard_card(self, card: Card):
         # Place a card onto the top of the discard pile
-        self.discard_pile.append(card)
+        self.discard_pile.append(card.value)
+
+    def discard_value(self, value: int):
+        # Place a card value onto the top of the discard pile
+        self.discard_pile.append(value)
 
     def reshuffle_discard(self):
         # If the deck is empty, reshuffle the discard pile back into the deck
         # The top card of the discard pile must stay as the visible discard
-        if len(self.discard_pile) > 1:
-            top_card = self.discard_pile.pop()   # Keep the visible discard
-            self.cards = self.discard_pile       # Move remaining cards back into the deck
-            self.discard_pile = [top_card]       # Reset discard pile with only the top card
-            self.shuffle()                        # Shuffle the new deck
+        pile = self.discard_pile
+        count = len(pile) - 1
+        if count > 0:
+            if self.journal is not None:
+                # Logged before the pile moves: undoing it reloads the whole pile,
+                # after the pile's own entries below have been undone
+                self.journal.append((self, UNDO_RESHUFFLE, pile.buffer[pile.head:pile.tail].tobytes(),
+                                     self.values[:count].tobytes(), self.rng.getstate()))
+            self._own_values()
+            top_value = pile.pop()                                   # Keep the visible discard
+            self.values[:count] = pile.buffer[pile.head:pile.tail]   # Move remaining cards back into the deck
+            pile.clear()
+            pile.append(top_value)
+            self.top = count
+            self.reshuffles += 1
+            self.shuffle()                                           # Shuffle the new deck
+
+    def undo(self, entry: tuple):
+        # Take back one journaled draw or reshuffle (a reshuffle overwrites the bottom of
+        # the array, which still holds cards that earlier undone draws will put back)
+        if entry[1] == UNDO_DRAW:
+            self.top += 1
+        else:
+            _, _, pile, overwritten, rng_state = entry
+            self.discard_pile.load(pile)
+            self._own_values()
+            self.values[:len(overwritten)] = array("b", overwritten)
+            self.rng.setstate(rng_state)
+            self.top = 0
+            self.reshuffles -= 1
+
+    def set_draw_pile(self, values: list[int]):
+        # Replace the draw pile contents (last value on top), e.g. for search determinizations
+        self._own_values()
+        self.top = len(values)
+        self.values[:self.top] = array("b", values)
+
+    def copy(self) -> "Deck":
+        # Independent deck sharing its arrays copy-on-write (same generator)
+        clone = Deck.__new__(Deck)
+        clone.__dict__.update(self.__dict__)
+        self.values_shared = clone.values_shared = True
+        clone.discard_pile = self.discard_pile.copy()
+        return clone
+
+    def snapshot(self) -> tuple:
+        # O(1) snapshot of the draw pile and discard pile (copy-on-write), plus the
+        # reshuffle count and generator state so later reshuffles replay identically
+        self.values_shared = True
+        return self.values, self.top, self.discard_pile.snapshot(), self.reshuffles, self.rng.getstate()
+
+    def restore(self, state: tuple):
+        # Return to a snapshot taken with snapshot(); it can be restored any number of times
+        self.values, self.top, discard_state, self.reshuffles, rng_state = state
+        self.values_shared = True
+        self.discard_pile.restore(discard_state)
+        self.rng.setstate(rng_state)
@@ -0,0 +1,245 @@
+# endgame.py
+from __future__ import annotations
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from typing import Optional
+from deck import CARD_COUNTS, DECK_SIZE, MIN_CARD_VALUE
+from player import Player, GRID_ROWS, GRID_COLS
+from game import (
+    Game, Action, DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION,
+    REVEAL_ACTIONS, REPLACE_ACTIONS, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD,
+    CHOOSE_REPLACE_MANDATORY, CHOOSE_REPLACE_OR_DISCARD_REVEAL
+)
+from bots import HIDDEN_CELL, REMOVED_CELL, grid_signature
+
+# Once the final round is triggered every other player has exactly one turn left, so
+# the rest of their round is a short chance tree: which pile, which card comes off the
+# deck, where it goes. Every face-down card (draw pile and hidden cells of every grid)
+# is an exchangeable draw from Game.unseen, so a grid's expected final score has a
+# closed form: per column, its card sum minus the chance that the end-of-round reveal
+# makes it a triple (sampling without replacement), by linearity of expectation.
+# Revealing a card cannot change that expectation, so "discard and reveal" is worth
+# the same as keeping the grid. Grids are canonicalised (cells sorted within each
+# column, columns sorted) since neither order changes the score.
+
+NUM_VALUES = len(CARD_COUNTS)
+CARD_VALUES = range(MIN_CARD_VALUE, MIN_CARD_VALUE + NUM_VALUES)
+# Column pattern match value meaning "three face-down cards": any value may complete it
+ANY_MATCH = "any"
+REMOVED_COLUMN = (REMOVED_CELL,) * GRID_ROWS
+# Size of the memos of final-turn tables and deck-draw values
+FINAL_TABLE_CACHE_SIZE = 1 << 16
+
+
+# ---------- Precomputed column tables ----------
+
+def _column_info(pattern: tuple[int, ...]) -> tuple[int, int, object]:
+    # (face-up sum, face-down count, match) of a canonical column, where match is the
+    # value every face-up card shares (the column can still become a triple), ANY_MATCH
+    # for an all face-down column, or None
+    shown = [code for code in pattern if code < HIDDEN_CELL]
+    hidden = len(pattern) - len(shown)
+    if not shown:
+        match = ANY_MATCH
+    elif shown.count(shown[0]) == len(shown):
+        match = shown[0]
+    else:
+        match = None
+    return sum(shown), hidden, match
+
+
+# Every canonical column that can occur (cells sorted, face-down cells coded HIDDEN_CELL)
+COLUMN_INFO: dict[tuple[int, ...], tuple[int, int, object]] = {
+    pattern: _column_info(pattern)
+    for pattern in combinations_with_replacement(list(CARD_VALUES) + [HIDDEN_CELL], GRID_ROWS)
+}
+COLUMN_INFO[REMOVED_COLUMN] = (0, 0, None)
+
+
+def _next_columns() -> dict[tuple[int, ...], dict[int, tuple]]:
+    # Successors of every live canonical column, for each cell code it holds
+    table = {}
+    for pattern in COLUMN_INFO:
+        if pattern == REMOVED_COLUMN:
+            continue
+        table[pattern] = {}
+        for code in set(pattern):
+            rest = list(pattern)
+            rest.remove(code)
+            table[pattern][code] = tuple(tuple(sorted(rest + [held])) for held in CARD_VALUES)
+    return table
+
+
+# NEXT_COLUMN[pattern][code][held - MIN_CARD_VALUE]: the column after a cell holding
+# code is replaced by the held card
+NEXT_COLUMN: dict[tuple[int, ...], dict[int, tuple]] = _next_columns()
+
+
+# FALLING[n][k] = n * (n - 1) * ... * (n - k + 1): the chance that k face-down cards
+# all take one value is FALLING[copies][k] / FALLING[pool size][k]
+FALLING = [[1, n, n * (n - 1), n * (n - 1) * (n - 2)] for n in range(DECK_SIZE + 1)]
+
+
+def pool_stats(unseen: tuple[int, ...]) -> tuple:
+    # Per-pool constants of column_value: (pool, size, mean value, expected score removed
+    # by a triple among three face-down cards)
+    total = sum(unseen)
+    mean = sum(value * count for value, count in zip(CARD_VALUES, unseen)) / total if total else 0.0
+    triple = (sum(3 * card * FALLING[count][3] for card, count in zip(CARD_VALUES, unseen)) /
+              FALLING[total][3] if total >= 3 else 0.0)
+    return unseen, total, mean, triple
+
+
+def column_value(pattern: tuple[int, ...], stats: tuple) -> float:
+    # Expected score of one column once the round ends, face-down cards drawn from the pool
+    shown_sum, hidden, match = COLUMN_INFO[pattern]
+    if not hidden:
+        return 0.0 if match is not None else float(shown_sum)
+    unseen, total, mean, triple = stats
+    if total < hidden:
+        return float(shown_sum)
+    value = shown_sum + hidden * mean
+    if match is ANY_MATCH:
+        value -= triple
+    elif match is not None:
+        value -= 3 * match * FALLING[unseen[match - MIN_CARD_VALUE]][hidden] / FALLING[total][hidden]
+    return value
+
+
+# ---------- Solver ----------
+
+def canonical_columns(player: Player) -> tuple[list[tuple[int, ...]], tuple]:
+    # Each grid column as a sorted pattern, plus the canonical (sorted) grid
+    signature = grid_signature(player)
+    columns = [tuple(sorted(signature[col + row * GRID_COLS] for row in range(GRID_ROWS)))
+               for col in range(GRID_COLS)]
+    return columns, tuple(sorted(columns))
+
+
+def _replacement(grid: tuple, held: int, stats: tuple, values: dict) -> tuple[float, tuple, int]:
+    # Best (expected final score, column pattern, cell code) replacement for a held card
+    # index; values memoizes column values for this pool and holds the grid's total
+    keep = values[None]
+    choice = (float("inf"), None, None)
+    for pattern in set(grid):
+        if pattern == REMOVED_COLUMN:
+            continue
+        for code, outcomes in NEXT_COLUMN[pattern].items():
+            after = outcomes[held]
+            if after not in values:
+                values[after] = column_value(after, stats)
+            score = keep - values[pattern] + values[after]
+            if score < choice[0]:
+                choice = (score, pattern, code)
+    return choice
+
+
+def _column_values(grid: tuple, stats: tuple) -> dict:
+    # Column values of a grid for one pool, with the grid's expected score under None
+    values = {pattern: column_value(pattern, stats) for pattern in set(grid)}
+    values[None] = sum(values[pattern] for pattern in grid)
+    return values
+
+
+@lru_cache(maxsize=FINAL_TABLE_CACHE_SIZE)
+def final_turn_table(grid: tuple, unseen: tuple[int, ...]) -> tuple:
+    # Best last move for every card the player could hold, for a canonical grid and the
+    # pool the face-down cards come from. Returns (replace, best, keep):
+    #   keep       = expected final score of the grid as it stands
+    #   replace[v] = (expected final score, column pattern, cell code) of the best
+    #                replacement when holding v
+    #   best[v]    = same, or (keep, None, HIDDEN_CELL) when discarding is better
+    stats = pool_stats(unseen)
+    values = _column_values(grid, stats)
+    keep = values[None]
+    can_discard = any(HIDDEN_CELL in pattern for pattern in grid)
+    replace, best = [], []
+    for held in range(NUM_VALUES):
+        choice = _replacement(grid, held, stats, values)
+        replace.append(choice)
+        best.append(choice if not can_discard or choice[0] < keep else (keep, None, HIDDEN_CELL))
+    return tuple(replace), tuple(best), keep
+
+
+@lru_cache(maxsize=FINAL_TABLE_CACHE_SIZE)
+def draw_value(grid: tuple, unseen: tuple[int, ...], reshuffled: Optional[tuple[int, ...]] = None) -> float:
+    # Expected final score of drawing from the deck and then playing best. The card comes
+    # from the unseen pool, or, when the deck is empty, from the discards reshuffled into
+    # it (which then become unseen again). Only the drawn card's move is solved per pool.
+    source = reshuffled if reshuffled is not None else unseen
+    total = sum(source)
+    if not total:
+        return float("inf")
+    can_discard = any(HIDDEN_CELL in pattern for pattern in grid)
+    pool = list(unseen) if reshuffled is None else [a + b for a, b in zip(unseen, reshuffled)]
+    expected = 0.0
+    for held, count in enumerate(source):
+        if not count:
+            continue
+        pool[held] -= 1
+        stats = pool_stats(tuple(pool))
+        values = _column_values(grid, stats)
+        score = _replacement(grid, held, stats, values)[0]
+        expected += count * (min(score, values[None]) if can_discard else score)
+        pool[held] += 1
+    return expected / total
+
+
+def _cell_of(columns: list[tuple[int, ...]], signature: tuple[int, ...], pattern: tuple, code: int) -> int:
+    # Grid cell holding code in a column whose pattern is pattern
+    for col, column in enumerate(columns):
+        if column == pattern:
+            for row in range(GRID_ROWS):
+                if signature[col + row * GRID_COLS] == code:
+                    return col + row * GRID_COLS
+    raise ValueError(f"no cell {code} in a column {pattern}")
+
+
+def pile_values(player: Player, game: Game) -> tuple[float, float]:
+    # Expected final score of taking the visible discard and of drawing from the deck
+    # (inf where that pile cannot be drawn)
+    _, grid = canonical_columns(player)
+    unseen = tuple(game.unseen)
+    pile = game.discard_pile
+    take = final_turn_table(grid, unseen)[0][pile[-1] - MIN_CARD_VALUE][0] if pile else float("inf")
+    if game.deck.top:
+        draw = draw_value(grid, unseen)
+    elif len(pile) > 1:
+        reshuffled = [0] * NUM_VALUES
+        for index in range(len(pile) - 1):
+            reshuffled[pile[index] - MIN_CARD_VALUE] += 1
+        draw = draw_value(grid, unseen, tuple(reshuffled))
+    else:
+        draw = float("inf")
+    return take, draw
+
+
+def final_turn_action(player: Player, game: Game) -> Action:
+    # Optimal action of a player's last turn (minimum expected round score)
+    phase = game.phase
+    if phase == CHOOSE_PILE:
+        take, draw = pile_values(player, game)
+        return DRAW_DISCARD_ACTION if take <= draw else DRAW_DECK_ACTION
+    if phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+        # Whatever is revealed, the expected score is the same
+        return REVEAL_ACTIONS[player.first_hidden_index()]
+
+    columns, grid = canonical_columns(player)
+    replace, best, _ = final_turn_table(grid, tuple(game.unseen))
+    table = best if phase == CHOOSE_REPLACE_OR_DISCARD else replace
+    _, pattern, code = table[player.held_value - MIN_CARD_VALUE]
+    if pattern is None:
+        return DISCARD_ACTION
+    return REPLACE_ACTIONS[_cell_of(columns, grid_signature(player), pattern, code)]
+
+
+def expected_final_score(player: Player, unseen: list[int]) -> float:
+    # Expected round score of a grid if no card of it changes any more
+    _, grid = canonical_columns(player)
+    return final_turn_table(grid, tuple(unseen))[2]
+
+
+def in_final_turn(game: Game) -> bool:
+    # True when the player to move is playing their last turn of the round
+    return game.final_round_triggered and game.phase in (
+        CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY, CHOOSE_REPLACE_OR_DISCARD_REVEAL)
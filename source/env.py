@@ -0,0 +1,338 @@
+# env.py
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+from batch import FULL_DECK, NO_CARD
+from deck import CARD_COUNTS, DECK_SIZE, MIN_CARD_VALUE
+from player import GRID_ROWS, GRID_COLS, GRID_SIZE
+from game import (
+    Action, INITIAL_REVEALS, INITIAL_REVEAL, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD,
+    CHOOSE_REPLACE_MANDATORY, CHOOSE_REPLACE_OR_DISCARD_REVEAL,
+    DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION, REVEAL_ACTIONS, REPLACE_ACTIONS
+)
+
+# Discrete action space shared by every environment:
+# 0-11 reveal a cell, 12-23 replace a cell with the held card, then the three pile actions
+REVEAL_OFFSET = 0
+REPLACE_OFFSET = GRID_SIZE
+DRAW_DECK_INDEX = 2 * GRID_SIZE
+DRAW_DISCARD_INDEX = DRAW_DECK_INDEX + 1
+DISCARD_INDEX = DRAW_DECK_INDEX + 2
+NUM_ACTIONS = DRAW_DECK_INDEX + 3
+# Game Action of each action index, to play a trained policy through Game
+ACTIONS: list[Action] = REVEAL_ACTIONS + REPLACE_ACTIONS + [DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION]
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+# Phases as stored in the phase observation (a round that ends is dealt again at once,
+# so ROUND_OVER never shows up)
+PHASES = (INITIAL_REVEAL, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY,
+          CHOOSE_REPLACE_OR_DISCARD_REVEAL)
+PHASE_INITIAL, PHASE_PILE, PHASE_REPLACE_OR_DISCARD, PHASE_REPLACE_MANDATORY, PHASE_REVEAL = range(len(PHASES))
+NUM_VALUES = len(CARD_COUNTS)
+# Unseen-card histogram at the start of a round, before the first discard is turned up
+FULL_COUNTS = np.array(CARD_COUNTS, dtype=np.int16)
+
+
+class VectorEnv:
+    # K Skyjo rounds stepped together for training agents, with the rules of Game
+    # Every seat is played by the agent (self-play): each step takes one action index
+    # per environment for the seat to move. Observations are from that seat's point of
+    # view (its own grid first, then the next seats in turn order) and are written into
+    # the same preallocated arrays on every call, so copy them to keep them.
+    # A round that ends is dealt again in the same step, like gym's vector auto-reset.
+
+    def __init__(self, num_envs: int, num_players: int = 2, seed: Optional[int] = None):
+        k, p = num_envs, num_players
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.rng = np.random.default_rng(seed)
+        self.envs = np.arange(k)
+        self.seat_offsets = np.arange(p)
+
+        # Game state, by absolute seat
+        self.deck = np.zeros((k, DECK_SIZE), dtype=np.int8)    # Drawn from index top - 1 down
+        self.top = np.zeros(k, dtype=np.int16)
+        # Discard piles live in discard[head:tail] (last one visible); columns removed
+        # during a round go underneath, so the buffer leaves room below the middle
+        self.discard = np.zeros((k, 2 * DECK_SIZE), dtype=np.int8)
+        self.head = np.zeros(k, dtype=np.int16)
+        self.tail = np.zeros(k, dtype=np.int16)
+        self.values = np.zeros((k, p, GRID_SIZE), dtype=np.int8)
+        self.revealed = np.zeros((k, p, GRID_SIZE), dtype=bool)
+        self.removed = np.zeros((k, p, GRID_SIZE), dtype=bool)
+        self.held = np.full(k, NO_CARD, dtype=np.int8)
+        self.phase = np.zeros(k, dtype=np.int8)
+        self.current = np.zeros(k, dtype=np.int8)
+        self.first = np.zeros(k, dtype=np.int8)                # Seat starting the reveals
+        self.reveals_done = np.zeros((k, p), dtype=np.int8)
+        self.final_round = np.zeros(k, dtype=bool)
+        self.final_trigger = np.zeros(k, dtype=np.int8)
+        self.final_turns = np.zeros(k, dtype=np.int8)
+        self.unseen = np.zeros((k, NUM_VALUES), dtype=np.int16)
+        self.round_scores = np.zeros((k, p), dtype=np.int16)   # Last finished round of each env
+        self.rounds_played = 0
+
+        # Output buffers, filled in place by reset() and step()
+        self.observations = {
+            "grid": np.zeros((k, p, GRID_SIZE), dtype=np.int8),      # Face-up values, 0 elsewhere
+            "revealed": np.zeros((k, p, GRID_SIZE), dtype=bool),
+            "removed": np.zeros((k, p, GRID_SIZE), dtype=bool),
+            "discard_top": np.zeros(k, dtype=np.int8),               # NO_CARD when empty
+            "held": np.zeros(k, dtype=np.int8),                      # NO_CARD when none
+            "unseen": np.zeros((k, NUM_VALUES), dtype=np.int8),      # Indexed by value - MIN_CARD_VALUE
+            "phase": np.zeros(k, dtype=np.int8),                     # Index into PHASES
+            "seat": np.zeros(k, dtype=np.int8),                      # Absolute seat to move
+            "final_turns": np.zeros(k, dtype=np.int8),               # -1 before the final round
+            "action_mask": np.zeros((k, NUM_ACTIONS), dtype=bool),
+        }
+        self.rewards = np.zeros((k, p), dtype=np.float32)    # Minus the round score, per seat
+        self.dones = np.zeros(k, dtype=bool)
+        self._order = np.zeros((k, p), dtype=np.intp)         # Seats seen from the seat to move
+        self._visible = np.zeros((k, p, GRID_SIZE), dtype=bool)
+
+    def reset(self) -> dict[str, np.ndarray]:
+        # Deal a new round in every environment
+        self.first[:] = 0
+        self._deal(self.envs)
+        self._observe()
+        return self.observations
+
+    def step(self, actions: np.ndarray) -> tuple[dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        # Play one action index per environment; returns (observations, rewards, dones)
+        # Rewards are non-zero only where a round ended: minus each seat's round score.
+        actions = np.asarray(actions)
+        envs = self.envs
+        if not self.observations["action_mask"][envs, actions].all():
+            bad = np.flatnonzero(~self.observations["action_mask"][envs, actions])
+            raise ValueError(f"illegal actions in environments {bad[:10].tolist()}")
+        self.rewards.fill(0)
+        self.dones.fill(False)
+
+        # Split the environments by action; each group is then handled in one go
+        reveal = actions < REPLACE_OFFSET
+        initial = np.flatnonzero(reveal & (self.phase == PHASE_INITIAL))
+        turn_reveal = np.flatnonzero(reveal & (self.phase == PHASE_REVEAL))
+        replace = np.flatnonzero((actions >= REPLACE_OFFSET) & (actions < DRAW_DECK_INDEX))
+        draw_deck = np.flatnonzero(actions == DRAW_DECK_INDEX)
+        draw_discard = np.flatnonzero(actions == DRAW_DISCARD_INDEX)
+        discard = np.flatnonzero(actions == DISCARD_INDEX)
+
+        if initial.size:
+            self._initial_reveal(initial, actions[initial])
+        if draw_deck.size:
+            self._draw_deck(draw_deck)
+        if draw_discard.size:
+            self.tail[draw_discard] -= 1
+            self.held[draw_discard] = self.discard[draw_discard, self.tail[draw_discard]]
+            self.phase[draw_discard] = PHASE_REPLACE_MANDATORY
+        if discard.size:
+            self._push(discard, self.held[discard])
+            self.held[discard] = NO_CARD
+            self.phase[discard] = PHASE_REVEAL
+
+        # Both ways of finishing a turn, then the end-of-turn rules
+        if turn_reveal.size:
+            self._reveal(turn_reveal, actions[turn_reveal] - REVEAL_OFFSET)
+        if replace.size:
+            self._replace(replace, actions[replace] - REPLACE_OFFSET)
+        ended = np.concatenate((turn_reveal, replace))
+        if ended.size:
+            self._end_turn(ended)
+
+        self._observe()
+        return self.observations, self.rewards, self.dones
+
+    # ---------- Rules ----------
+
+    def _deal(self, envs: np.ndarray):
+        # Shuffle full decks for the given environments and deal their round
+        self.deck[envs] = self.rng.permuted(np.broadcast_to(FULL_DECK, (envs.size, DECK_SIZE)), axis=1)
+        self._deal_from_deck(envs)
+
+    def _deal_from_deck(self, envs: np.ndarray):
+        # Deal grids and the first discard from the current deck order, as Game.start_game:
+        # each seat takes its 12 cards in turn from the top of the deck
+        p = self.num_players
+        dealt = p * GRID_SIZE
+        self.values[envs] = self.deck[envs, DECK_SIZE - dealt:][:, ::-1].reshape(-1, p, GRID_SIZE)
+        self.revealed[envs] = False
+        self.removed[envs] = False
+        first_discard = self.deck[envs, DECK_SIZE - dealt - 1]
+        self.top[envs] = DECK_SIZE - dealt - 1
+        self.head[envs] = DECK_SIZE
+        self.discard[envs, DECK_SIZE] = first_discard
+        self.tail[envs] = DECK_SIZE + 1
+        self.held[envs] = NO_CARD
+        self.phase[envs] = PHASE_INITIAL
+        self.current[envs] = self.first[envs]
+        self.reveals_done[envs] = 0
+        self.final_round[envs] = False
+        self.final_turns[envs] = 0
+        self.unseen[envs] = FULL_COUNTS
+        self.unseen[envs, first_discard - MIN_CARD_VALUE] -= 1
+
+    def _initial_reveal(self, envs: np.ndarray, cells: np.ndarray):
+        # Each seat reveals two cards; the last seat to reveal then takes the first turn
+        self._reveal(envs, cells)
+        seats = self.current[envs]
+        done = self.reveals_done[envs, seats] + 1
+        self.reveals_done[envs, seats] = done
+        finished = done >= INITIAL_REVEALS
+        everyone = finished & (self.reveals_done[envs] >= INITIAL_REVEALS).all(axis=1)
+        self.phase[envs[everyone]] = PHASE_PILE
+        moving = envs[finished & ~everyone]
+        self.current[moving] = (self.current[moving] + 1) % self.num_players
+
+    def _reveal(self, envs: np.ndarray, cells: np.ndarray):
+        seats = self.current[envs]
+        self.revealed[envs, seats, cells] = True
+        self.unseen[envs, self.values[envs, seats, cells] - MIN_CARD_VALUE] -= 1
+
+    def _draw_deck(self, envs: np.ndarray):
+        # Draw the top card; an empty deck first takes back all but the visible discard
+        empty = envs[self.top[envs] == 0]
+        for env in empty:
+            self._reshuffle(env)
+        top = self.top[envs] - 1
+        self.top[envs] = top
+        held = self.deck[envs, top]
+        self.held[envs] = held
+        self.unseen[envs, held - MIN_CARD_VALUE] -= 1
+        self.phase[envs] = PHASE_REPLACE_OR_DISCARD
+
+    def _reshuffle(self, env: int):
+        # Shuffle all but the visible discard back into the deck (rare, so one env at a time)
+        head, tail = int(self.head[env]), int(self.tail[env])
+        count = tail - head - 1
+        self.deck[env, :count] = self.rng.permutation(self.discard[env, head:tail - 1])
+        self.discard[env, DECK_SIZE] = self.discard[env, tail - 1]
+        self.head[env] = DECK_SIZE
+        self.tail[env] = DECK_SIZE + 1
+        self.top[env] = count
+        # Recount what is still unseen, as Game.count_unseen
+        visible = self.revealed[env] & ~self.removed[env]
+        unseen = FULL_COUNTS - np.bincount(self.values[env][visible] - MIN_CARD_VALUE, minlength=NUM_VALUES)
+        unseen[self.discard[env, DECK_SIZE] - MIN_CARD_VALUE] -= 1
+        self.unseen[env] = unseen
+
+    def _push(self, envs: np.ndarray, values: np.ndarray):
+        # Put cards on top of the discard piles
+        tail = self.tail[envs]
+        self.discard[envs, tail] = values
+        self.tail[envs] = tail + 1
+
+    def _replace(self, envs: np.ndarray, cells: np.ndarray):
+        # The held card takes the cell; the old card is shown and goes on the discard pile
+        seats = self.current[envs]
+        old = self.values[envs, seats, cells]
+        hidden = ~self.revealed[envs, seats, cells]
+        self.unseen[envs[hidden], old[hidden] - MIN_CARD_VALUE] -= 1
+        self._push(envs, old)
+        self.values[envs, seats, cells] = self.held[envs]
+        self.revealed[envs, seats, cells] = True
+        self.held[envs] = NO_CARD
+
+    def _triple_columns(self, envs: np.ndarray, seats: np.ndarray) -> np.ndarray:
+        # (n, GRID_COLS) columns of three equal face-up cards on the given grids
+        v = self.values[envs, seats].reshape(-1, GRID_ROWS, GRID_COLS)
+        shown = (self.revealed[envs, seats] & ~self.removed[envs, seats]).reshape(-1, GRID_ROWS, GRID_COLS)
+        return shown.all(axis=1) & (v[:, 0] == v[:, 1]) & (v[:, 1] == v[:, 2])
+
+    def _end_turn(self, envs: np.ndarray):
+        # Triple columns of the seat that moved, final-round bookkeeping, next seat
+        seats = self.current[envs]
+        triples = self._triple_columns(envs, seats)
+        if triples.any():
+            for col in range(GRID_COLS):
+                hit = np.flatnonzero(triples[:, col])
+                if not hit.size:
+                    continue
+                e, s = envs[hit], seats[hit]
+                cells = col + GRID_COLS * np.arange(GRID_ROWS)
+                self.removed[e[:, None], s[:, None], cells] = True
+                self.revealed[e[:, None], s[:, None], cells] = False
+                # The three cards go underneath the discard pile
+                head = self.head[e] - GRID_ROWS
+                self.discard[e[:, None], head[:, None] + np.arange(GRID_ROWS)] = \
+                    self.values[e, s, col][:, None]
+                self.head[e] = head
+
+        triggered = self.final_round[envs]
+        turns = self.final_turns[envs] - triggered
+        newly = ~triggered & (self.revealed[envs, seats] | self.removed[envs, seats]).all(axis=1)
+        turns[newly] = self.num_players - 1
+        self.final_turns[envs] = turns
+        self.final_round[envs] = triggered | newly
+        self.final_trigger[envs[newly]] = seats[newly]
+        over = (triggered | newly) & (turns <= 0)
+
+        playing = envs[~over]
+        self.current[playing] = (seats[~over] + 1) % self.num_players
+        self.phase[playing] = PHASE_PILE
+        if over.any():
+            self._end_round(envs[over])
+
+    def _end_round(self, envs: np.ndarray):
+        # Reveal everything, remove triple columns, score, then deal the next round
+        # starting with the seat after the one who triggered the final round
+        p = self.num_players
+        self.revealed[envs] |= ~self.removed[envs]
+        values = self.values[envs].reshape(-1, p, GRID_ROWS, GRID_COLS)
+        matching = (values[:, :, 0] == values[:, :, 1]) & (values[:, :, 1] == values[:, :, 2])
+        removed = self.removed[envs] | np.repeat(matching[:, :, None, :], GRID_ROWS, axis=2).reshape(-1, p, GRID_SIZE)
+        scores = np.where(removed, 0, self.values[envs]).sum(axis=2, dtype=np.int16)
+        self.round_scores[envs] = scores
+        self.rewards[envs] = -scores
+        self.dones[envs] = True
+        self.rounds_played += envs.size
+        self.first[envs] = (self.final_trigger[envs] + 1) % p
+        self._deal(envs)
+
+    # ---------- Observations ----------
+
+    def _observe(self):
+        # Write every observation and action mask in place, from the mover's point of view
+        obs = self.observations
+        envs = self.envs
+        current = self.current
+        order = self._order
+        np.add(current[:, None], self.seat_offsets, out=order)
+        np.remainder(order, self.num_players, out=order)
+        rows = envs[:, None]
+
+        revealed, removed = obs["revealed"], obs["removed"]
+        revealed[:] = self.revealed[rows, order]
+        removed[:] = self.removed[rows, order]
+        np.logical_and(revealed, ~removed, out=self._visible)
+        np.multiply(self.values[rows, order], self._visible, out=obs["grid"], casting="unsafe")
+
+        tail, head = self.tail, self.head
+        obs["discard_top"][:] = np.where(tail > head, self.discard[envs, tail - 1], NO_CARD)
+        obs["held"][:] = self.held
+        obs["unseen"][:] = self.unseen
+        obs["phase"][:] = self.phase
+        obs["seat"][:] = current
+        obs["final_turns"][:] = np.where(self.final_round, self.final_turns, -1)
+
+        # Legal actions of the current phase, as in Game.legal_actions
+        phase = self.phase
+        mask = obs["action_mask"]
+        own_revealed, own_removed = revealed[:, 0], removed[:, 0]
+        hidden = ~(own_revealed | own_removed)
+        revealing = (phase == PHASE_INITIAL) | (phase == PHASE_REVEAL)
+        np.logical_and(hidden, revealing[:, None], out=mask[:, REVEAL_OFFSET:REPLACE_OFFSET])
+        replacing = (phase == PHASE_REPLACE_OR_DISCARD) | (phase == PHASE_REPLACE_MANDATORY)
+        np.logical_and(~own_removed, replacing[:, None], out=mask[:, REPLACE_OFFSET:DRAW_DECK_INDEX])
+        choosing = phase == PHASE_PILE
+        length = tail - head
+        mask[:, DRAW_DECK_INDEX] = choosing & ((self.top > 0) | (length > 1))
+        mask[:, DRAW_DISCARD_INDEX] = choosing & (length > 0)
+        mask[:, DISCARD_INDEX] = (phase == PHASE_REPLACE_OR_DISCARD) & hidden.any(axis=1)
+
+    def sample_actions(self, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        # A uniformly random legal action index per environment (baseline / smoke test)
+        rng = rng if rng is not None else self.rng
+        mask = self.observations["action_mask"]
+        scores = rng.random(mask.shape)
+        scores[~mask] = -1.0
+        return scores.argmax(axis=1)
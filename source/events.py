@@ -0,0 +1,102 @@
+# events.py
+from __future__ import annotations
+import json
+from collections import Counter
+from typing import IO, Any, NamedTuple, Optional
+
+# Kinds of events emitted by Game to its observers
+DRAW_EVENT = "draw"                     # info: "deck" or "discard"
+REPLACE_EVENT = "replace"               # value: card placed; info: value of the card it replaced
+REVEAL_EVENT = "reveal"
+DISCARD_EVENT = "discard"
+COLUMN_EVENT = "column_eliminated"      # cell: column index
+FINAL_ROUND_EVENT = "final_round"
+ROUND_END_EVENT = "round_end"           # info: round score of each seat
+
+
+class GameEvent(NamedTuple):
+    # Something that happened in a game; seat is the player it happened to
+    kind: str
+    seat: int
+    value: Optional[int] = None         # Card value involved, if any
+    cell: int = -1                      # Grid cell index (row * GRID_COLS + col), or column
+    info: Any = None                    # Kind-specific detail, see the kinds above
+
+
+class GameMetrics:
+    # In-process aggregator: event counts plus per-phase timing of bot decisions and of
+    # the engine applying them (recorded by Game.play_round while attached)
+    def __init__(self):
+        self.events = Counter()                          # Event kind -> count
+        self.phase_counts = Counter()                    # Phase -> actions played in it
+        self.decision_time: dict[str, float] = {}        # Phase -> seconds choosing actions
+        self.apply_time: dict[str, float] = {}           # Phase -> seconds applying them
+        self.decision_histogram: dict[str, Counter] = {}  # Phase -> log2(ns) bucket -> count
+        self.apply_histogram: dict[str, Counter] = {}
+
+    def attach(self, game) -> GameMetrics:
+        # Start collecting from a game
+        game.metrics = self
+        game.add_observer(self)
+        return self
+
+    def detach(self, game):
+        game.metrics = None
+        game.remove_observer(self)
+
+    def __call__(self, event: GameEvent):
+        self.events[event.kind] += 1
+
+    def record_phase(self, phase: str, decision: float, apply: float):
+        # Time spent on one action, split between the bot and the engine
+        self.phase_counts[phase] += 1
+        self.decision_time[phase] = self.decision_time.get(phase, 0.0) + decision
+        self.apply_time[phase] = self.apply_time.get(phase, 0.0) + apply
+        self.decision_histogram.setdefault(phase, Counter())[int(decision * 1e9).bit_length()] += 1
+        self.apply_histogram.setdefault(phase, Counter())[int(apply * 1e9).bit_length()] += 1
+
+    def merge(self, other: GameMetrics) -> GameMetrics:
+        # Combine metrics collected elsewhere (e.g. by another worker process)
+        self.events.update(other.events)
+        self.phase_counts.update(other.phase_counts)
+        for mine, theirs in ((self.decision_time, other.decision_time), (self.apply_time, other.apply_time)):
+            for phase, seconds in theirs.items():
+                mine[phase] = mine.get(phase, 0.0) + seconds
+        for mine, theirs in ((self.decision_histogram, other.decision_histogram),
+                             (self.apply_histogram, other.apply_histogram)):
+            for phase, counts in theirs.items():
+                mine.setdefault(phase, Counter()).update(counts)
+        return self
+
+    def summary(self) -> str:
+        # Human-readable report: event counts, then where the time went per phase
+        lines = ["events: " + ", ".join(f"{kind} {count}" for kind, count in sorted(self.events.items()))]
+        total = sum(self.decision_time.values()) + sum(self.apply_time.values())
+        for phase, count in self.phase_counts.most_common():
+            decision, apply = self.decision_time[phase], self.apply_time[phase]
+            lines.append(f"{phase:<34} {count:>9} actions  decide {decision / count * 1e6:8.2f} µs  "
+                         f"apply {apply / count * 1e6:6.2f} µs  "
+                         f"{(decision + apply) / total if total else 0:6.1%} of time")
+        return "\n".join(lines)
+
+
+class EventLog:
+    # Observer streaming events to a file as JSON lines
+    def __init__(self, file: str | IO[str]):
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "w", encoding="utf-8") if self.owns_file else file
+
+    def __call__(self, event: GameEvent):
+        self.file.write(json.dumps(event._asdict()) + "\n")
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> EventLog:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,82 +1,521 @@
 # game.py
-from deck import Deck
-from player import Player
+from __future__ import annotations
+import random
+import time
+from typing import NamedTuple, Optional
+from deck import Deck, CARD_COUNTS, MIN_CARD_VALUE
+from events import (
+    GameEvent, GameMetrics, DRAW_EVENT, REPLACE_EVENT, REVEAL_EVENT, DISCARD_EVENT,
+    COLUMN_EVENT, FINAL_ROUND_EVENT, ROUND_END_EVENT
+)
+from player import Player, GRID_COLS, GRID_SIZE
+
+# Turn phases of the state machine driven by Game.apply_action
+SETUP = "setup"
+INITIAL_REVEAL = "initial_reveal"
+CHOOSE_PILE = "choose_pile"
+CHOOSE_REPLACE_OR_DISCARD = "choose_replace_or_discard"
+CHOOSE_REPLACE_MANDATORY = "choose_replace_mandatory"
+CHOOSE_REPLACE_OR_DISCARD_REVEAL = "choose_replace_or_discard_reveal"
+ROUND_OVER = "round_over"
+
+# Kinds of actions a player can take
+DRAW_DECK = "draw_deck"
+DRAW_DISCARD = "draw_discard"
+DISCARD = "discard"
+REPLACE = "replace"
+REVEAL = "reveal"
+
+# Number of cards each player reveals before normal play starts
+INITIAL_REVEALS = 2
+# A match ends after the round that takes a player's total to this many points
+MATCH_TARGET = 100
+
+# Zobrist keys of the turn state; player hashes are rotated by seat before being combined
+_zobrist_rng = random.Random(0x6A3E)
+PHASE_KEYS = {phase: _zobrist_rng.getrandbits(64) for phase in (
+    SETUP, INITIAL_REVEAL, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY,
+    CHOOSE_REPLACE_OR_DISCARD_REVEAL, ROUND_OVER)}
+SEAT_KEYS = [_zobrist_rng.getrandbits(64) for _ in range(64)]
+FINAL_ROUND_KEYS = [_zobrist_rng.getrandbits(64) for _ in range(64)]
+HASH_MASK = (1 << 64) - 1
+
+
+class Action(NamedTuple):
+    # A single player decision; row and col are only used by grid actions
+    kind: str
+    row: int = -1
+    col: int = -1
+
+
+# Shared action instances so legal_actions() never allocates new tuples
+DRAW_DECK_ACTION = Action(DRAW_DECK)
+DRAW_DISCARD_ACTION = Action(DRAW_DISCARD)
+DISCARD_ACTION = Action(DISCARD)
+# Grid actions are indexed by cell index (row * GRID_COLS + col)
+REVEAL_ACTIONS = [Action(REVEAL, i // GRID_COLS, i % GRID_COLS) for i in range(GRID_SIZE)]
+REPLACE_ACTIONS = [Action(REPLACE, i // GRID_COLS, i % GRID_COLS) for i in range(GRID_SIZE)]
+
 
 class Game:
-    def __init__(self, player_names: list[str]):
+    def __init__(self, player_names: list[str | Player], seed: Optional[int] = None):
+        # Seeded random generator shared by every shuffle and by bot players
+        self.seed = seed
+        self.rng = random.Random(seed)
+
         # Create the deck, discard pile, and all players
-        self.deck = Deck()
+        # (entries may be names or ready-made Player instances such as bots)
+        self.deck = Deck(self.rng)
         self.discard_pile = self.deck.discard_pile
-        self.players = [Player(name) for name in player_names]
+        self.players = [p if isinstance(p, Player) else Player(p) for p in player_names]
 
         # Track turn order and round progression
         self.current_player_index = 0
-        self.final_round_triggered_by = None
+        self.final_round_triggered_by: Optional[Player] = None
         self.final_round_triggered = False
         self.final_turns_remaining = 0
-        self.phase = "setup"
+        self.phase = SETUP
+
+        # Per-player count of cards revealed during the initial reveal phase
+        self.initial_reveals_done = [0] * len(self.players)
+        # Messages produced by the last rule applications (e.g. triple columns)
+        self.messages: list[str] = []
+        # Score of each player for the last finished round
+        self.round_scores: list[int] = []
+        # Cards of each value not face-up anywhere (draw pile + hidden grid cells),
+        # indexed by value - MIN_CARD_VALUE; kept up to date for card-counting bots
+        self.unseen = list(CARD_COUNTS)
+        # Actions played this round, each with the card value it made public (or None)
+        self.history: list[tuple[Action, Optional[int]]] = []
+        # Rounds started so far, deck order at the start of this round and, for every
+        # reshuffle this round, (history index of the draw, new draw pile) for game records
+        self.round_number = 0
+        self.first_player_index = 0     # Seat that starts the initial reveals of this round
+        self.deal_order = b""
+        self.reshuffle_log: list[tuple[int, bytes]] = []
+        # Undo support for make_move/unmake_move: inverse entries logged by players and
+        # the deck, one frame of turn state per move, and moves taken back (for redo)
+        self.undo_log: list[tuple] = []
+        self.undo_frames: list[tuple] = []
+        self.redo_actions: list[Action] = []
+        # Callables receiving a GameEvent for everything that happens (see events.py);
+        # emitting is skipped entirely while the list is empty
+        self.observers: list = []
+        # Per-phase timing collected by play_round, see GameMetrics.attach
+        self.metrics: Optional[GameMetrics] = None
 
     def start_game(self):
         # Deal grids and clear held cards for all players
+        self.round_number += 1
+        self.first_player_index = self.current_player_index
+        self.deal_order = self.deck.values.tobytes()
+        self.reshuffle_log = []
+        self.undo_log.clear()
+        self.undo_frames.clear()
+        self.redo_actions.clear()
         for player in self.players:
             player.setup_grid(self.deck)
             player.held_card = None
 
         # Draw the first revealed card for the discard pile
-        first_card = self.deck.draw_card()
-        if first_card:
-            first_card.reveal()
-            self.discard_pile.append(first_card)
+        self.unseen[:] = CARD_COUNTS
+        first_value = self.deck.draw_value()
+        if first_value is not None:
+            self.deck.discard_value(first_value)
+            self.unseen[first_value - MIN_CARD_VALUE] -= 1
+
+        # Every player starts the round by revealing two cards
+        self.initial_reveals_done = [0] * len(self.players)
+        self.messages = []
+        self.history = []
+        self.phase = INITIAL_REVEAL
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def _emit(self, kind: str, seat: int, value: Optional[int] = None, cell: int = -1, info=None):
+        # Send one event to every observer (callers check self.observers first)
+        event = GameEvent(kind, seat, value, cell, info)
+        for observer in self.observers:
+            observer(event)
 
     def get_current_player(self):
         # Return the player whose turn is active
         return self.players[self.current_player_index]
 
     def next_turn(self):
-        # Advance to the next player's turn, handling final round logic
+        # Advance to the next player's turn
+        self.current_player_index = (self.current_player_index + 1) % len(self.players)
+
+    # ---------- Headless turn state machine ----------
+
+    def legal_actions(self) -> list[Action]:
+        # List every action the current player may take in the current phase
+        player = self.get_current_player()
+        phase = self.phase
+
+        if phase == INITIAL_REVEAL or phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+            hidden = player.hidden_mask()
+            return [REVEAL_ACTIONS[i] for i in range(GRID_SIZE) if hidden >> i & 1]
+
+        if phase == CHOOSE_PILE:
+            actions = []
+            if self.deck.top or len(self.discard_pile) > 1:
+                actions.append(DRAW_DECK_ACTION)
+            if self.discard_pile:
+                actions.append(DRAW_DISCARD_ACTION)
+            return actions
+
+        if phase == CHOOSE_REPLACE_OR_DISCARD or phase == CHOOSE_REPLACE_MANDATORY:
+            removed = player.removed_mask
+            actions = [REPLACE_ACTIONS[i] for i in range(GRID_SIZE) if not removed >> i & 1]
+            # Discarding is only possible if a hidden card is left to reveal
+            if phase == CHOOSE_REPLACE_OR_DISCARD and not player.all_cards_revealed():
+                actions.append(DISCARD_ACTION)
+            return actions
+
+        return []
+
+    def apply_action(self, action: Action) -> bool:
+        # Apply one action for the current player and advance the state machine
+        # Returns False (leaving the state untouched) if the action is not legal
+        player = self.get_current_player()
+        kind = action.kind
+        phase = self.phase
+        self.messages = []
+
+        if phase == INITIAL_REVEAL:
+            if kind != REVEAL or not player.reveal_card(action.row, action.col):
+                return False
+            value = player.values[action.row * GRID_COLS + action.col]
+            self.unseen[value - MIN_CARD_VALUE] -= 1
+            self.history.append((action, value))
+            if self.observers:
+                self._emit(REVEAL_EVENT, self.current_player_index, value, action.row * GRID_COLS + action.col)
+            self.initial_reveals_done[self.current_player_index] += 1
+
+            # Move to next player or into normal play
+            if self.initial_reveals_done[self.current_player_index] >= INITIAL_REVEALS:
+                if all(done >= INITIAL_REVEALS for done in self.initial_reveals_done):
+                    self.phase = CHOOSE_PILE
+                else:
+                    self.next_turn()
+            return True
+
+        if phase == CHOOSE_PILE:
+            if kind == DRAW_DECK:
+                reshuffles = self.deck.reshuffles
+                player.draw_from_deck(self.deck)
+                if player.held_value is None:
+                    return False
+                if self.deck.reshuffles != reshuffles:
+                    # Seen discards went back into the deck: recount (rare)
+                    self.count_unseen()
+                    self.reshuffle_log.append((len(self.history),
+                                               self.deck.values[:self.deck.top + 1].tobytes()))
+                else:
+                    self.unseen[player.held_value - MIN_CARD_VALUE] -= 1
+                self.history.append((action, player.held_value))
+                if self.observers:
+                    self._emit(DRAW_EVENT, self.current_player_index, player.held_value, info="deck")
+                self.phase = CHOOSE_REPLACE_OR_DISCARD
+                return True
+            if kind == DRAW_DISCARD:
+                player.draw_from_discard(self.deck)
+                if player.held_value is None:
+                    return False
+                self.history.append((action, None))
+                if self.observers:
+                    self._emit(DRAW_EVENT, self.current_player_index, player.held_value, info="discard")
+                self.phase = CHOOSE_REPLACE_MANDATORY
+                return True
+            return False
+
+        if phase == CHOOSE_REPLACE_OR_DISCARD or phase == CHOOSE_REPLACE_MANDATORY:
+            if kind == REPLACE:
+                # Eliminated columns leave holes that cannot be filled again
+                index = action.row * GRID_COLS + action.col
+                if player.removed_mask >> index & 1:
+                    return False
+                shown = None
+                old_value = player.values[index]
+                if player.hidden_mask() >> index & 1:
+                    # The replaced card is shown as it goes to the discard pile
+                    shown = player.values[index]
+                    self.unseen[shown - MIN_CARD_VALUE] -= 1
+                held = player.held_value
+                player.replace_card(action.row, action.col, self.deck)
+                self.history.append((action, shown))
+                if self.observers:
+                    self._emit(REPLACE_EVENT, self.current_player_index, held, index, old_value)
+                self.end_turn()
+                return True
+            if kind == DISCARD and phase == CHOOSE_REPLACE_OR_DISCARD:
+                if player.all_cards_revealed():
+                    return False
+                held = player.held_value
+                player.discard_drawn_card(self.deck)
+                self.history.append((action, None))
+                if self.observers:
+                    self._emit(DISCARD_EVENT, self.current_player_index, held)
+                self.phase = CHOOSE_REPLACE_OR_DISCARD_REVEAL
+                return True
+            return False
+
+        if phase == CHOOSE_REPLACE_OR_DISCARD_REVEAL:
+            if kind != REVEAL or not player.reveal_instead_of_replace(action.row, action.col):
+                return False
+            value = player.values[action.row * GRID_COLS + action.col]
+            self.unseen[value - MIN_CARD_VALUE] -= 1
+            self.history.append((action, value))
+            if self.observers:
+                self._emit(REVEAL_EVENT, self.current_player_index, value, action.row * GRID_COLS + action.col)
+            self.end_turn()
+            return True
+
+        return False
+
+    # ---------- Reversible moves ----------
+
+    def _set_journal(self, journal: Optional[list]):
+        # Point every mutable component at the undo log (or detach them with None)
+        self.deck.journal = self.discard_pile.journal = journal
+        for player in self.players:
+            player.journal = journal
+
+    def make_move(self, action: Action) -> bool:
+        # apply_action that unmake_move can take back exactly, without copying the game
+        # Only the pieces a move changes are saved: inverse entries from Player and Deck,
+        # plus this frame of turn state. The unseen histogram is rebuilt from history,
+        # except around reshuffles where it is saved whole.
+        index = self.current_player_index
+        frame = (len(self.undo_log), self.phase, index, self.final_round_triggered,
+                 self.final_round_triggered_by, self.final_turns_remaining,
+                 self.initial_reveals_done[index], self.round_scores, self.messages,
+                 len(self.reshuffle_log),
+                 list(self.unseen) if action.kind == DRAW_DECK and not self.deck.top else None)
+        self._set_journal(self.undo_log)
+        try:
+            applied = self.apply_action(action)
+        finally:
+            self._set_journal(None)
+        if applied:
+            self.undo_frames.append(frame)
+        else:
+            self._undo_to(frame[0])
+        return applied
+
+    def _undo_to(self, mark: int):
+        # Apply the inverse entries logged after mark, newest first
+        log = self.undo_log
+        while len(log) > mark:
+            entry = log.pop()
+            entry[0].undo(entry)
+
+    def unmake_move(self) -> Optional[Action]:
+        # Take back the last make_move; returns its action, or None if there is none
+        if not self.undo_frames:
+            return None
+        (mark, self.phase, index, self.final_round_triggered, self.final_round_triggered_by,
+         self.final_turns_remaining, reveals_done, self.round_scores, self.messages,
+         reshuffles, unseen) = self.undo_frames.pop()
+        self._undo_to(mark)
+        self.current_player_index = index
+        self.initial_reveals_done[index] = reveals_done
+        del self.reshuffle_log[reshuffles:]
+
+        action, shown = self.history.pop()
+        if unseen is not None:
+            self.unseen[:] = unseen
+        elif shown is not None:
+            self.unseen[shown - MIN_CARD_VALUE] += 1
+        return action
+
+    def undo(self) -> Optional[Action]:
+        # unmake_move for interactive use: the move can be played again with redo()
+        # (callers making a new move should clear redo_actions)
+        action = self.unmake_move()
+        if action is not None:
+            self.redo_actions.append(action)
+        return action
+
+    def redo(self) -> Optional[Action]:
+        # Replay the last move taken back by undo(); draws and reshuffles come out the same
+        if not self.redo_actions:
+            return None
+        action = self.redo_actions.pop()
+        self.make_move(action)
+        return action
+
+    def copy(self) -> Game:
+        # Independent copy of the whole game state for search; players become plain
+        # Player objects and the copy continues the same random sequence
+        clone = Game.__new__(Game)
+        clone.__dict__.update(self.__dict__)
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.deck = self.deck.copy()
+        clone.deck.rng = clone.rng
+        clone.discard_pile = clone.deck.discard_pile
+        clone.players = [player.copy() for player in self.players]
+        if self.final_round_triggered_by is not None:
+            trigger_index = self.players.index(self.final_round_triggered_by)
+            clone.final_round_triggered_by = clone.players[trigger_index]
+        clone.initial_reveals_done = list(self.initial_reveals_done)
+        clone.messages = []
+        clone.round_scores = list(self.round_scores)
+        clone.unseen = list(self.unseen)
+        clone.history = list(self.history)
+        clone.reshuffle_log = list(self.reshuffle_log)
+        clone.undo_log, clone.undo_frames, clone.redo_actions = [], [], []
+        clone.observers, clone.metrics = [], None
+        return clone
+
+    def zobrist_hash(self) -> int:
+        # 64-bit hash of the position: every grid (face-down values included), held card,
+        # visible discard, seat to move, phase and final-round state. Player and deck
+        # parts are kept up to date by their own moves, so this only combines a few words.
+        return self._combine_hash([player.zobrist for player in self.players])
+
+    def public_hash(self) -> int:
+        # Same as zobrist_hash, but face-down cells count whatever their value: every
+        # state a player cannot tell apart hashes the same (information-set search)
+        return self._combine_hash([player.public_zobrist for player in self.players])
+
+    def _combine_hash(self, grid_hashes: list[int]) -> int:
+        zobrist = (self.deck.zobrist ^ PHASE_KEYS[self.phase] ^
+                   SEAT_KEYS[self.current_player_index])
+        if self.final_round_triggered:
+            zobrist ^= FINAL_ROUND_KEYS[self.final_turns_remaining]
+        for seat, grid in enumerate(grid_hashes):
+            shift = seat * 13 % 64
+            zobrist ^= (grid << shift | grid >> (64 - shift)) & HASH_MASK
+        return zobrist
+
+    def count_unseen(self):
+        # Rebuild the unseen-card histogram from scratch (only needed after a reshuffle)
+        unseen = self.unseen
+        unseen[:] = CARD_COUNTS
+        for value in self.discard_pile:
+            unseen[value - MIN_CARD_VALUE] -= 1
+        for player in self.players:
+            visible = player.revealed_mask & ~player.removed_mask
+            for index in range(GRID_SIZE):
+                if visible >> index & 1:
+                    unseen[player.values[index] - MIN_CARD_VALUE] -= 1
+            if player.held_value is not None:
+                unseen[player.held_value - MIN_CARD_VALUE] -= 1
+
+    def play_round(self) -> list[int]:
+        # Let every (bot) player choose its actions until the round is over
+        # With metrics attached, decision and engine time are recorded per phase
+        metrics = self.metrics
+        while self.phase != ROUND_OVER:
+            player = self.get_current_player()
+            if metrics is None:
+                applied = self.apply_action(player.choose_action(self))
+            else:
+                phase = self.phase
+                start = time.perf_counter()
+                action = player.choose_action(self)
+                chosen = time.perf_counter()
+                applied = self.apply_action(action)
+                metrics.record_phase(phase, chosen - start, time.perf_counter() - chosen)
+            if not applied:
+                raise ValueError(f"{player.name} chose an illegal action in phase {self.phase}")
+        return self.round_scores
+
+    def match_over(self, target: int = MATCH_TARGET) -> bool:
+        # True once a finished round has taken some player's total to target
+        return self.phase == ROUND_OVER and any(player.score >= target for player in self.players)
+
+    def play_match(self, target: int = MATCH_TARGET) -> list[int]:
+        # Play (bot) rounds until the match is over; returns every player's total.
+        # The lowest total wins (get_winner)
+        while True:
+            self.play_round()
+            if self.match_over(target):
+                return [player.score for player in self.players]
+            self.reset_round()
+
+    def _check_triple_columns(self, player: Player):
+        # Remove the player's triple columns, telling observers about each one
+        if self.observers and player.triple_columns:
+            seat = self.players.index(player)
+            columns = player.triple_columns
+            while columns:
+                col = (columns & -columns).bit_length() - 1
+                self._emit(COLUMN_EVENT, seat, player.values[col], col)
+                columns &= columns - 1
+        self.messages.extend(player.check_triple_columns(self.discard_pile))
+
+    def end_turn(self):
+        # Apply the triple-column rule; only the current grid changed this turn
+        self._check_triple_columns(self.get_current_player())
+
+        # Every turn played after the trigger uses up one final turn
         if self.final_round_triggered:
-            if self.current_player_index == self.final_round_triggered_by:
-                # Skip the player who triggered the final round
-                self.current_player_index = (self.current_player_index + 1) % len(self.players)
             self.final_turns_remaining -= 1
 
-        # Move to the next player
-        self.current_player_index = (self.current_player_index + 1) % len(self.players)
+        # End round or continue play
+        if self.check_end_round():
+            self.end_round()
+        else:
+            self.next_turn()
+            self.phase = CHOOSE_PILE
 
     def check_end_round(self) -> bool:
         # Detect when the final round should start or finish
         if not self.final_round_triggered:
-            # First detection: a player has revealed all cards
-            for player in self.players:
-                if player.all_cards_revealed():
-                    self.final_round_triggered = True
-                    self.final_round_triggered_by = player
-                    # Other players each get one more turn
-                    self.final_turns_remaining = len(self.players) - 1
-                    return False
-            return False
-        else:
-            # Final round already active: check if all remaining turns are done
-            return self.final_turns_remaining <= 0
+            # First detection: the current player has revealed all cards
+            current = self.get_current_player()
+            if not current.all_cards_revealed():
+                return False
+            self.final_round_triggered = True
+            self.final_round_triggered_by = current
+            # Other players each get one more turn
+            self.final_turns_remaining = len(self.players) - 1
+            if self.observers:
+                self._emit(FINAL_ROUND_EVENT, self.current_player_index)
+        # Final round active: check if all remaining turns are done
+        return self.final_turns_remaining <= 0
+
+    def end_round(self):
+        # Reveal remaining cards, apply triples, and calculate scores
+        self.round_scores = []
+        for seat, player in enumerate(self.players):
+            if self.observers:
+                # Every card turned up here is announced like any other reveal
+                hidden = player.hidden_mask()
+                for index in range(GRID_SIZE):
+                    if hidden >> index & 1:
+                        self._emit(REVEAL_EVENT, seat, player.values[index], index)
+            player.reveal_all_cards()
+            self._check_triple_columns(player)
+            self.round_scores.append(player.calculate_score())
+        self.phase = ROUND_OVER
+        if self.observers:
+            self._emit(ROUND_END_EVENT, self.current_player_index, info=list(self.round_scores))
+
+    def get_winner(self) -> Player:
+        # The player with the lowest total score is leading the game
+        return min(self.players, key=lambda p: p.score)
 
     def reset_round(self):
-        # Prepare the next round: new deck, reset flags and grids
-        self.deck = Deck()
-        self.discard_pile = self.deck.discard_pile
+        # Prepare the next round: reshuffle the same deck, reset flags and grids
+        self.deck.reset()
 
         # Next round starts with the player after the one who triggered final round
-        self.next_turn()
+        if self.final_round_triggered_by is not None:
+            trigger_index = self.players.index(self.final_round_triggered_by)
+            self.current_player_index = (trigger_index + 1) % len(self.players)
 
-        print(self.final_round_triggered_by,self.current_player_index)  # Debug info
-
-        self.phase = "setup"
+        self.final_round_triggered_by = None
         self.final_round_triggered = False
         self.final_turns_remaining = 0
 
-        # Rebuild grids and clear held cards
-        for player in self.players:
-            player.setup_grid(self.deck)
-            player.held_card = None
-
-        # Draw the first discard pile card again
+        # Deal new grids and draw the first discard pile card again
         self.start_game()
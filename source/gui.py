@@ -1,25 +1,108 @@
 # gui.py
+import queue
+import time
 import tkinter as tk
-from game import Game
-from deck import Deck
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from game import (
+    Game, Action, DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION, REPLACE, REVEAL,
+    INITIAL_REVEAL, CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY,
+    CHOOSE_REPLACE_OR_DISCARD_REVEAL, ROUND_OVER
+)
+from player import GRID_ROWS, GRID_COLS
+from records import RecordWriter
+from bots import BotPlayer, expected_value_action
+from endgame import final_turn_action, in_final_turn, expected_final_score
 
 CARD_WIDTH = 60
 CARD_HEIGHT = 90
 MARGIN = 10
-GRID_Y_OFFSET = 350
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 650
+
+# Bots: pause between their actions (seconds), how often the window checks for a
+# decision from the worker thread (ms), and the pause between spectated rounds (ms)
+BOT_MOVE_DELAY = 0.4
+BOT_POLL_MS = 10
+SPECTATE_ROUND_PAUSE_MS = 2000
+# Redraws per second when spectating
+DEFAULT_FPS = 30
+
+# Instruction shown in the info label for each turn phase
+PHASE_MESSAGES = {
+    INITIAL_REVEAL: "Reveal 2 cards each",
+    CHOOSE_PILE: "Next turn",
+    CHOOSE_REPLACE_OR_DISCARD: "Card drawn: choose to replace or discard",
+    CHOOSE_REPLACE_MANDATORY: "Card drawn from discard: must replace a card",
+    CHOOSE_REPLACE_OR_DISCARD_REVEAL: "Card discarded: reveal one hidden card",
+}
+
+# Wording of the hints that do not name a grid cell
+PILE_HINTS = {
+    DRAW_DECK_ACTION: "draw from the deck",
+    DRAW_DISCARD_ACTION: "take the discard",
+    DISCARD_ACTION: "discard the drawn card",
+}
+
+# Click targets attached to canvas items (grid cells also carry seat, row and col)
+DECK_TARGET = ("deck",)
+DISCARD_TARGET = ("discard",)
+
+# Seat layout: each seat is a block with its name and score above the 4×3 grid and
+# room on the right for the deck, discard pile and held card (stacked), which follow
+# the current player. Blocks fill columns of SEATS_PER_COLUMN seats, left to right.
+GRID_WIDTH = GRID_COLS * (CARD_WIDTH + MARGIN) - MARGIN
+GRID_HEIGHT = GRID_ROWS * (CARD_HEIGHT + MARGIN) - MARGIN
+NAME_HEIGHT = 30
+PILE_GAP = 20
+SEAT_WIDTH = GRID_WIDTH + PILE_GAP + CARD_WIDTH + 3 * MARGIN
+SEAT_HEIGHT = NAME_HEIGHT + GRID_HEIGHT + 3 * MARGIN
+SEATS_PER_COLUMN = 2
+
+
+def seat_origin(seat: int) -> tuple[int, int]:
+    # Top-left corner of a seat's grid on the canvas
+    column, row = divmod(seat, SEATS_PER_COLUMN)
+    return column * SEAT_WIDTH + 2 * MARGIN, row * SEAT_HEIGHT + NAME_HEIGHT + MARGIN
+
+
+def canvas_size(seats: int) -> tuple[int, int]:
+    # Canvas width and height that fit every seat block
+    columns = -(-seats // SEATS_PER_COLUMN)
+    return columns * SEAT_WIDTH + MARGIN, min(seats, SEATS_PER_COLUMN) * SEAT_HEIGHT
+
 
 class GameWindow(tk.Tk):
-    def __init__(self, game: Game):
+    # Seats holding a BotPlayer are played by the computer. Bot decisions run on a worker
+    # thread and come back through a queue polled with after(), so a slow bot never
+    # freezes the window. While a decision is outstanding the window does not touch the
+    # game (clicks and undo are ignored), so the bot can read the live state.
+    # With only bots seated the window is a spectator: bots play at one action per
+    # move_delay seconds, rounds follow each other, and the board is redrawn at most fps
+    # times per second whatever the pace, several actions coalescing into one frame.
+    def __init__(self, game: Game, recorder: Optional[RecordWriter] = None,
+                 move_delay: float = BOT_MOVE_DELAY, fps: int = DEFAULT_FPS):
         super().__init__()
-        self.title("Skyjo - 2 Players")
+        self.title(f"Skyjo - {len(game.players)} Players")
         self.game = game
-        self.held_card_rect = None
-        self.held_card_text = None
+        # Optional writer saving every finished round as a game record
+        self.recorder = recorder
+        self.rounds_recorded = 0
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Bot decisions: worker thread, finished decisions as (token, future), and the
+        # token of the one awaited (a new token makes older answers stale)
+        self.move_delay = move_delay
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bot")
+        self.decisions: queue.Queue = queue.Queue()
+        self.decision_token = 0
+        self.pending: Optional[Future] = None
+        self.next_move_time = 0.0
+        self.spectating = all(isinstance(player, BotPlayer) for player in game.players)
+        self.frame_ms = max(1, round(1000 / fps))
+        self.dirty = False
 
         # Main canvas
-        self.canvas = tk.Canvas(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
+        width, height = canvas_size(len(game.players))
+        self.canvas = tk.Canvas(self, width=width, height=height)
         self.canvas.pack()
 
         # Information label (turn, instructions, etc.)
@@ -33,272 +116,336 @@ class GameWindow(tk.Tk):
         )
         self.continue_button.pack_forget()
 
-        # Track game state
-        self.action_phase = "initial_reveal"
-        self.initial_reveals_done = {player.name: 0 for player in self.game.players}
+        # Undo button: takes back the last action of the round
+        self.undo_button = tk.Button(self, text="UNDO", font=("Arial", 12), command=self.undo_clicked)
+        self.undo_button.pack(pady=5)
+
+        # Hint button: suggests a move (solved exactly on the last turn of the round)
+        self.hint_button = tk.Button(self, text="HINT", font=("Arial", 12), command=self.hint_clicked)
+        self.hint_button.pack(pady=5)
 
-        self.deck_rect = None
-        self.discard_rect = None
+        # Retained canvas items: created once, then only reconfigured
+        self.item_targets = {}   # Canvas item id -> click target
+        self.item_options = {}   # Canvas item id -> options currently displayed
+        self.item_coords = {}    # Movable canvas item id -> coordinates currently displayed
+        self.create_items()
+        self.canvas.tag_bind("clickable", "<Button-1>", self.on_canvas_click)
 
         self.draw_board()
         self.update_info("Reveal 2 cards each")
+        if self.spectating:
+            self.after(self.frame_ms, self.render_frame)
+        self.schedule_bot()
 
-    def draw_board(self):
-        # Clear canvas before redrawing
-        self.canvas.delete("all")
-        current = self.game.get_current_player()
+    # ---------- Rendering ----------
+
+    def create_items(self):
+        # Create the fixed pool of canvas items for every seat and for the piles
+        self.seat_items = []
 
         for i, player in enumerate(self.game.players):
-            # Vertical positioning for each player
-            y_offset = i * GRID_Y_OFFSET + MARGIN
-            grid_height = 3 * (CARD_HEIGHT + MARGIN) - MARGIN
-
-            # Player name and score
-            name_x = MARGIN + 20
-            name_y = y_offset + grid_height / 2
-            self.canvas.create_text(name_x, name_y, text=player.name,
-                                    font=("Arial", 16, "bold"), anchor="w")
-            self.canvas.create_text(name_x, name_y + 20, text=f"Score: {player.score}",
-                                    font=("Arial", 12), anchor="w")
-
-            # Horizontal alignment for the 4×3 grid
-            start_x = (CANVAS_WIDTH - 4 * (CARD_WIDTH + MARGIN)) // 2
-
-            # Draw all cards in player's grid
-            for r, row in enumerate(player.grid):
-                for c, card in enumerate(row):
-                    if card is None:
-                        continue
-
-                    x0 = start_x + c * (CARD_WIDTH + MARGIN)
-                    y0 = y_offset + r * (CARD_HEIGHT + MARGIN)
-                    x1 = x0 + CARD_WIDTH
-                    y1 = y0 + CARD_HEIGHT
-
-                    fill = "white" if card.revealed else "gray"
-                    outline = "black"
-
-                    # Highlight logic depending on phase and state
-                    if player == current:
-                        if self.action_phase == "choose_replace_or_discard":
-                            outline = "red"
-                        elif self.action_phase == "choose_replace_mandatory":
-                            outline = "red"
-                        elif self.action_phase == "choose_replace_or_discard_reveal" and not card.revealed:
-                            outline = "red"
-                        elif self.action_phase == "initial_reveal" and not card.revealed:
-                            outline = "red"
+            grid_x, grid_y = seat_origin(i)
 
+            # Player name and score on one line above the grid
+            name_y = grid_y - NAME_HEIGHT / 2
+            self.canvas.create_text(grid_x, name_y, text=player.name,
+                                    font=("Arial", 16, "bold"), anchor="w")
+            score_text = self.canvas.create_text(grid_x + GRID_WIDTH, name_y, text="",
+                                                 font=("Arial", 12), anchor="e")
+
+            # One rectangle and one label per grid cell, row-major
+            cells = []
+            for r in range(GRID_ROWS):
+                for c in range(GRID_COLS):
+                    x0 = grid_x + c * (CARD_WIDTH + MARGIN)
+                    y0 = grid_y + r * (CARD_HEIGHT + MARGIN)
                     rect = self.canvas.create_rectangle(
-                        x0, y0, x1, y1, fill=fill, outline=outline, width=2
+                        x0, y0, x0 + CARD_WIDTH, y0 + CARD_HEIGHT, width=2, tags=("clickable",)
                     )
                     text = self.canvas.create_text(
-                        (x0+x1)/2, (y0+y1)/2, font=("Purisa", 20),
-                        text=str(card.value) if card.revealed else "?"
+                        x0 + CARD_WIDTH / 2, y0 + CARD_HEIGHT / 2, font=("Purisa", 20),
+                        tags=("clickable",)
                     )
+                    self.item_targets[rect] = self.item_targets[text] = ("card", i, r, c)
+                    cells.append((rect, text))
+            self.seat_items.append((score_text, cells))
+
+        # Deck, discard pile and held card follow the current player's grid
+        self.deck_rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="white", tags=("clickable",))
+        self.deck_text = self.canvas.create_text(0, 0, font=("Purisa", 16), text="Deck",
+                                                 tags=("clickable",))
+        self.discard_rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="white", tags=("clickable",))
+        self.discard_text = self.canvas.create_text(0, 0, font=("Purisa", 20), tags=("clickable",))
+        self.held_card_rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="yellow")
+        self.held_card_text = self.canvas.create_text(0, 0, font=("Purisa", 20))
+        for item in (self.deck_rect, self.deck_text):
+            self.item_targets[item] = DECK_TARGET
+        for item in (self.discard_rect, self.discard_text):
+            self.item_targets[item] = DISCARD_TARGET
+
+    def set_item(self, item: int, **options):
+        # Reconfigure a canvas item only if its options actually changed
+        if self.item_options.get(item) != options:
+            self.canvas.itemconfigure(item, **options)
+            self.item_options[item] = options
+
+    def move_card_item(self, rect: int, text: int, x0: float, y0: float):
+        # Move a card rectangle and its label only if their position changed
+        if self.item_coords.get(rect) != (x0, y0):
+            self.canvas.coords(rect, x0, y0, x0 + CARD_WIDTH, y0 + CARD_HEIGHT)
+            self.canvas.coords(text, x0 + CARD_WIDTH / 2, y0 + CARD_HEIGHT / 2)
+            self.item_coords[rect] = (x0, y0)
 
-                    # Bind card clicks
-                    self.canvas.tag_bind(rect, "<Button-1>",
-                                         lambda e, pi=i, row=r, col=c: self.card_clicked(pi, row, col))
-                    self.canvas.tag_bind(text, "<Button-1>",
-                                         lambda e, pi=i, row=r, col=c: self.card_clicked(pi, row, col))
-
-            # Draw deck and discard only for current player
-            if player == current:
-                # Determine highlight colors
-                deck_color = "red" if self.action_phase == "choose_pile" else "black"
-                discard_color = "red" if self.action_phase in ("choose_pile", "choose_replace_or_discard") else "black"
-
-                # Deck position
-                deck_x0 = start_x + 4 * (CARD_WIDTH + MARGIN) + 20
-                deck_y0 = y_offset
-                deck_x1 = deck_x0 + CARD_WIDTH
-                deck_y1 = deck_y0 + CARD_HEIGHT
-
-                # Draw deck
-                self.deck_rect = self.canvas.create_rectangle(
-                    deck_x0, deck_y0, deck_x1, deck_y1,
-                    fill="white", outline=deck_color,
-                    width=3 if deck_color == "red" else 1
-                )
-                self.canvas.create_text(deck_x0 + CARD_WIDTH//2,
-                                        deck_y0 + CARD_HEIGHT//2, font=("Purisa", 16), text="Deck")
-                self.canvas.tag_bind(self.deck_rect, "<Button-1>",
-                                     lambda e: self.deck_clicked())
-
-                # Draw discard pile
-                discard_x0 = deck_x0
-                discard_y0 = deck_y0 + CARD_HEIGHT + 20
-                discard_x1 = discard_x0 + CARD_WIDTH
-                discard_y1 = discard_y0 + CARD_HEIGHT
-
-                self.discard_rect = self.canvas.create_rectangle(
-                    discard_x0, discard_y0, discard_x1, discard_y1,
-                    fill="white", outline=discard_color,
-                    width=3 if discard_color == "red" else 1
-                )
-
-                # Display top card of discard pile
-                if self.game.discard_pile:
-                    top_card = self.game.discard_pile[-1]
-                    self.canvas.create_text(
-                        discard_x0 + CARD_WIDTH//2,
-                        discard_y0 + CARD_HEIGHT//2,
-                        text=str(top_card.value), font=("Purisa", 20)
-                    )
-
-                self.canvas.tag_bind(self.discard_rect, "<Button-1>",
-                                     lambda e: self.discard_clicked())
-
-        # Draw the held (drawn) card visually on the side
-        self.draw_held_card()
-
-    def draw_held_card(self):
-        # Remove old held card graphics
-        if self.held_card_rect:
-            self.canvas.delete(self.held_card_rect)
-        if self.held_card_text:
-            self.canvas.delete(self.held_card_text)
+    def draw_board(self):
+        # Bring the retained canvas items in line with the game state
+        phase = self.game.phase
+        current_index = self.game.current_player_index
 
-        current = self.game.get_current_player()
-        card = current.held_card
-
-        # Display held card next to deck
-        if card:
-            deck_coords = self.canvas.coords(self.deck_rect)
-            x0 = deck_coords[2] + 10
-            y0 = deck_coords[1]
-            x1 = x0 + CARD_WIDTH
-            y1 = y0 + CARD_HEIGHT
-
-            self.held_card_rect = self.canvas.create_rectangle(
-                x0, y0, x1, y1, fill="yellow"
-            )
-            self.held_card_text = self.canvas.create_text(
-                (x0+x1)/2, (y0+y1)/2, text=str(card.value), font=("Purisa", 20) 
-            )
+        for i, player in enumerate(self.game.players):
+            score_text, cells = self.seat_items[i]
+            self.set_item(score_text, text=f"Score: {player.score}")
+
+            # Highlight logic depending on phase and state
+            highlight_all = i == current_index and phase in (
+                CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY)
+            highlight_hidden = i == current_index and phase in (
+                INITIAL_REVEAL, CHOOSE_REPLACE_OR_DISCARD_REVEAL)
+
+            for index, (rect, text) in enumerate(cells):
+                if player.removed_mask >> index & 1:
+                    self.set_item(rect, state="hidden")
+                    self.set_item(text, state="hidden")
+                    continue
+                revealed = bool(player.revealed_mask >> index & 1)
+                outline = "red" if highlight_all or (highlight_hidden and not revealed) else "black"
+                self.set_item(rect, state="normal", fill="white" if revealed else "gray",
+                              outline=outline)
+                self.set_item(text, state="normal",
+                              text=str(player.values[index]) if revealed else "?")
+
+        # Deck, discard pile and held card are stacked next to the current player's grid
+        grid_x, pile_y = seat_origin(current_index)
+        pile_x = grid_x + GRID_WIDTH + PILE_GAP
+        self.move_card_item(self.deck_rect, self.deck_text, pile_x, pile_y)
+        self.move_card_item(self.discard_rect, self.discard_text, pile_x, pile_y + CARD_HEIGHT + MARGIN)
+
+        deck_color = "red" if phase == CHOOSE_PILE else "black"
+        discard_color = "red" if phase in (CHOOSE_PILE, CHOOSE_REPLACE_OR_DISCARD) else "black"
+        self.set_item(self.deck_rect, outline=deck_color, width=3 if deck_color == "red" else 1)
+        self.set_item(self.discard_rect, outline=discard_color,
+                      width=3 if discard_color == "red" else 1)
+
+        # Display top card of discard pile
+        discard_pile = self.game.discard_pile
+        self.set_item(self.discard_text, text=str(discard_pile[-1]) if discard_pile else "")
+
+        # Display the held (drawn) card next to the deck
+        held = self.game.get_current_player().held_value
+        self.move_card_item(self.held_card_rect, self.held_card_text, pile_x,
+                            pile_y + 2 * (CARD_HEIGHT + MARGIN))
+        if held is None:
+            self.set_item(self.held_card_rect, state="hidden")
+            self.set_item(self.held_card_text, state="hidden")
+        else:
+            self.set_item(self.held_card_rect, state="normal")
+            self.set_item(self.held_card_text, state="normal", text=str(held))
 
     def update_info(self, msg=""):
         # Update instruction/status label
         current = self.game.get_current_player()
         self.info_label.config(text=f"{current.name}'s turn | {msg}")
 
-    # ---------- User Interaction ----------
+    def refresh(self):
+        # Show the new turn: at once when someone is playing, at the next frame when spectating
+        if self.spectating:
+            self.dirty = True
+        else:
+            self.draw_board()
+            self.update_info(PHASE_MESSAGES[self.game.phase])
 
-    def deck_clicked(self):
-        # Handle drawing from the deck
-        current = self.game.get_current_player()
-        if self.action_phase == "choose_pile" and current.held_card is None:
-            card = current.draw_from_deck(self.game.deck)
-            if card:
-                self.action_phase = "choose_replace_or_discard"
-                self.draw_board()
-                self.update_info("Card drawn: choose to replace or discard")
+    def render_frame(self):
+        # Spectator frame clock: draw the latest state if anything changed since the last frame
+        if self.dirty:
+            self.dirty = False
+            self.draw_board()
+            self.update_info(PHASE_MESSAGES[self.game.phase])
+        self.after(self.frame_ms, self.render_frame)
 
-    def discard_clicked(self):
-        # Handle drawing or discarding to the discard pile
-        current = self.game.get_current_player()
+    # ---------- Bots ----------
 
-        # Draw from discard pile
-        if self.action_phase == "choose_pile" and current.held_card is None and self.game.discard_pile:
-            card = current.draw_from_discard(self.game.deck)
-            if card:
-                self.action_phase = "choose_replace_mandatory"
-                self.draw_board()
-                self.update_info("Card drawn from discard: must replace a card")
-
-        # Discard held card
-        elif self.action_phase == "choose_replace_or_discard" and current.held_card:
-            current.discard_drawn_card(self.game.deck)
-            self.action_phase = "choose_replace_or_discard_reveal"
-            self.draw_board()
-            self.update_info("Card discarded: reveal one hidden card")
+    def bot_to_move(self) -> bool:
+        # True when the seat to move is played by the computer
+        return self.game.phase != ROUND_OVER and isinstance(self.game.get_current_player(), BotPlayer)
 
-    def card_clicked(self, player_idx, row, col):
-        # Handle card click inside grid
-        current = self.game.get_current_player()
-        if player_idx != self.game.current_player_index:
+    def schedule_bot(self):
+        # Hand the decision to the worker thread if a bot is to move
+        if self.pending is not None or not self.bot_to_move():
             return
+        self.decision_token += 1
+        token = self.decision_token
+        self.next_move_time = time.perf_counter() + self.move_delay
+        self.pending = self.executor.submit(self.game.get_current_player().choose_action, self.game)
+        self.pending.add_done_callback(lambda future: self.decisions.put((token, future)))
+        self.after(BOT_POLL_MS, self.poll_bot, token)
+
+    def poll_bot(self, token: int):
+        # Pick up the worker's answer to decision token, polling until it arrives;
+        # answers to cancelled decisions are skipped, and a cancelled poll stops
+        if token != self.decision_token:
+            return
+        try:
+            answer, future = self.decisions.get_nowait()
+        except queue.Empty:
+            self.after(BOT_POLL_MS, self.poll_bot, token)
+            return
+        if answer != token:
+            self.poll_bot(token)
+            return
+        # Errors of the bot surface here, in the Tk thread
+        action = future.result()
+        wait = max(0, round((self.next_move_time - time.perf_counter()) * 1000))
+        self.after(wait, self.play_bot_action, token, action)
+
+    def play_bot_action(self, token: int, action: Action):
+        # Play a bot's decision once its move delay has passed (unless made stale meanwhile)
+        if token != self.decision_token:
+            return
+        self.pending = None
+        if not self.game.make_move(action):
+            raise RuntimeError(f"{self.game.get_current_player().name} chose an illegal action {action}")
+        self.game.redo_actions.clear()
+        if self.game.phase == ROUND_OVER:
+            self.show_round_end()
+        else:
+            self.refresh()
+            self.schedule_bot()
 
-        card = current.grid[row][col]
-
-        # Initial 2-card reveal phase
-        if self.action_phase == "initial_reveal" and not card.revealed:
-            current.reveal_card(row, col)
-            self.initial_reveals_done[current.name] += 1
+    def cancel_bot(self):
+        # Forget the decision in progress (its answer will be ignored)
+        self.decision_token += 1
+        self.pending = None
 
-            # Move to next player or into normal play
-            if self.initial_reveals_done[current.name] >= 2:
-                if all(v >= 2 for v in self.initial_reveals_done.values()):
-                    self.action_phase = "choose_pile"
-                else:
-                    self.game.next_turn()
+    # ---------- User Interaction ----------
 
-            self.draw_board()
-            self.update_info("Reveal 2 cards each")
+    def on_canvas_click(self, event):
+        # Single dispatcher for every clickable item, resolved from the item under the cursor
+        items = self.canvas.find_withtag("current")
+        target = self.item_targets.get(items[0]) if items else None
+        if target is None:
             return
+        if target is DECK_TARGET:
+            self.deck_clicked()
+        elif target is DISCARD_TARGET:
+            self.discard_clicked()
+        else:
+            _, player_idx, row, col = target
+            self.card_clicked(player_idx, row, col)
 
-        # Replace card using drawn card
-        if self.action_phase.startswith("choose_replace") and current.held_card:
-            current.replace_card(row, col, self.game.deck)
-            current.held_card = None
-            self.end_turn()
+    def play_action(self, action: Action):
+        # Forward a click to the game engine and refresh the view if it was legal
+        if self.bot_to_move() or not self.game.make_move(action):
             return
+        self.game.redo_actions.clear()
+        if self.game.phase == ROUND_OVER:
+            self.show_round_end()
+        else:
+            self.draw_board()
+            self.update_info(PHASE_MESSAGES[self.game.phase])
+            self.schedule_bot()
 
-        # Reveal instead of replacing (after discarding)
-        if self.action_phase == "choose_replace_or_discard_reveal" and not card.revealed:
-            current.reveal_instead_of_replace(row, col)
-            self.end_turn()
+    def undo_clicked(self):
+        # Take back the last action, including the one that ended the round; against
+        # bots, keep undoing until a person is to move again
+        if self.spectating or (self.pending is not None and not self.pending.done()):
+            return
+        if self.game.undo() is None:
+            return
+        self.cancel_bot()
+        while self.bot_to_move() and self.game.undo() is not None:
+            pass
+        self.continue_button.pack_forget()
+        self.draw_board()
+        self.update_info(PHASE_MESSAGES[self.game.phase])
+        self.schedule_bot()
 
-    def end_turn(self):
-        # Apply triple-column rule for each player
-        current = self.game.get_current_player()
-        for player in self.game.players:
-            player.check_triple_columns(self.game.discard_pile)
-
-        # Trigger final round if needed
-        if not self.game.final_round_triggered:
-            if current.all_cards_revealed():
-                self.game.final_round_triggered = True
-                self.game.final_round_triggered_by = current
-                self.game.final_turns_remaining = len(self.game.players) - 1
+    def hint_clicked(self):
+        # Show the suggested action in the info label
+        game = self.game
+        if game.phase == ROUND_OVER or self.bot_to_move():
+            return
+        player = game.get_current_player()
+        if in_final_turn(game):
+            action = final_turn_action(player, game)
+            note = f" (last turn, expected score now {expected_final_score(player, game.unseen):.1f})"
         else:
-            if current != self.game.final_round_triggered_by:
-                self.game.final_turns_remaining -= 1
-
-        # End round or continue play
-        if self.game.check_end_round():
-            self.end_round()
+            action = expected_value_action(player, game)
+            note = ""
+        if action.row >= 0:
+            target = f"{action.kind} the card at row {action.row + 1}, column {action.col + 1}"
         else:
-            self.game.next_turn()
-            self.action_phase = "choose_pile"
-            self.draw_board()
-            self.update_info("Next turn")
+            target = PILE_HINTS[action]
+        self.update_info(f"Hint: {target}{note}")
 
-    def end_round(self):
-        # Reveal remaining cards, apply triples, and calculate scores
-        for player in self.game.players:
-            for row in player.grid:
-                for card in row:
-                    if card:
-                        card.reveal()
+    def deck_clicked(self):
+        # Handle drawing from the deck
+        if self.game.phase == CHOOSE_PILE:
+            self.play_action(DRAW_DECK_ACTION)
 
-            player.check_triple_columns(self.game.discard_pile)
-            player.calculate_score()
+    def discard_clicked(self):
+        # Draw from the discard pile, or discard the held card onto it
+        if self.game.phase == CHOOSE_PILE:
+            self.play_action(DRAW_DISCARD_ACTION)
+        elif self.game.phase == CHOOSE_REPLACE_OR_DISCARD:
+            self.play_action(DISCARD_ACTION)
 
-        # Determine winner of this round
-        winner = min(self.game.players, key=lambda p: p.score)
-        self.update_info(f"Round ended. Winner: {winner.name}")
+    def card_clicked(self, player_idx, row, col):
+        # Handle card click inside grid
+        if player_idx != self.game.current_player_index:
+            return
 
-        # Show continue button to proceed to next round
-        self.continue_button.pack()
+        # Reveal during the initial phase or after discarding, otherwise replace
+        if self.game.phase in (INITIAL_REVEAL, CHOOSE_REPLACE_OR_DISCARD_REVEAL):
+            self.play_action(Action(REVEAL, row, col))
+        elif self.game.phase in (CHOOSE_REPLACE_OR_DISCARD, CHOOSE_REPLACE_MANDATORY):
+            self.play_action(Action(REPLACE, row, col))
+
+    def show_round_end(self):
+        # Announce the leader and show continue button to proceed to next round
+        # (the round is recorded once it can no longer be undone: see record_round)
+        winner = self.game.get_winner()
         self.draw_board()
+        self.update_info(f"Round ended. Winner: {winner.name}")
+        self.dirty = False
+        if self.spectating:
+            self.after(SPECTATE_ROUND_PAUSE_MS, self.start_new_round)
+        else:
+            self.continue_button.pack()
+
+    def record_round(self):
+        # Save the finished round; only called when it is left for good (next round or
+        # closing the window), since until then undo can reopen it
+        if self.recorder is not None and self.game.phase == ROUND_OVER:
+            self.recorder.write(self.game, self.rounds_recorded)
+            self.rounds_recorded += 1
 
     def start_new_round(self):
         # Reset UI and game state for the next round
         self.continue_button.pack_forget()
+        self.cancel_bot()
+        self.record_round()
         self.game.reset_round()
-        self.initial_reveals_done = {player.name: 0 for player in self.game.players}
-        self.action_phase = "initial_reveal"
         self.draw_board()
         self.update_info("New round started! Reveal 2 cards.")
+        self.schedule_bot()
+
+    def on_close(self):
+        # Flush recorded rounds and let the bots go before the window goes away
+        self.cancel_bot()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for player in self.game.players:
+            if hasattr(player, "close"):
+                player.close()
+        if self.recorder is not None:
+            self.record_round()
+            self.recorder.close()
+        self.destroy()
@@ -0,0 +1,260 @@
+# league.py
+from __future__ import annotations
+import argparse
+import heapq
+import random
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+from bots import BOTS, create_bot, validate_strategies
+from game import Game, MATCH_TARGET
+from tournament import game_seed
+
+# League file layout:
+#   LEAGUE_MAGIC, LEAGUE_HEADER (matches rated, number of entrants), then one ENTRY per
+#   entrant in order of arrival: name (UTF-8, NUL padded), Elo rating, matches played,
+#   match wins (ties shared), sum of final match totals.
+# The whole table is held in memory (one row per strategy, however many matches were
+# rated) and ratings are updated match by match. Rows changed since the last flush are
+# written back in place, every flush_every matches and on close.
+LEAGUE_MAGIC = b"SKYJELO1"
+LEAGUE_HEADER = struct.Struct("<QI")
+NAME_BYTES = 32
+ENTRY = struct.Struct(f"<{NAME_BYTES}sdQdq")
+TABLE_OFFSET = len(LEAGUE_MAGIC) + LEAGUE_HEADER.size
+INITIAL_RATING = 1500.0
+# Elo K factor of a two-player match; with more seats it is shared between the pairings
+DEFAULT_K = 16.0
+# Matches rated between two writes of the table
+DEFAULT_FLUSH_MATCHES = 10_000
+# Matches a worker plays before streaming its results back
+DEFAULT_CHUNK_MATCHES = 50
+
+
+class Standing(NamedTuple):
+    # One leaderboard row
+    name: str
+    rating: float
+    matches: int
+    wins: float
+    mean_total: float
+
+
+class League:
+    # Elo ratings of every strategy that has played, stored in a compact league file
+    def __init__(self, path: str | Path, k: float = DEFAULT_K,
+                 flush_every: int = DEFAULT_FLUSH_MATCHES):
+        self.path = Path(path)
+        self.k = k
+        self.flush_every = flush_every
+        self.names: list[str] = []
+        self.index: dict[str, int] = {}           # Name -> row
+        self.ratings = array("d")
+        self.matches = array("Q")
+        self.wins = array("d")
+        self.totals = array("q")
+        self.matches_rated = 0
+        self.dirty: set[int] = set()              # Rows changed since the last flush
+        self.unflushed = 0                        # Matches rated since the last flush
+        if self.path.exists():
+            self._load()
+            self.file = open(self.path, "r+b")
+        else:
+            self.file = open(self.path, "w+b")
+            self.file.write(LEAGUE_MAGIC + LEAGUE_HEADER.pack(0, 0))
+
+    def _load(self):
+        data = self.path.read_bytes()
+        if data[:len(LEAGUE_MAGIC)] != LEAGUE_MAGIC:
+            raise ValueError(f"{self.path} is not a league file")
+        self.matches_rated, count = LEAGUE_HEADER.unpack_from(data, len(LEAGUE_MAGIC))
+        for name, rating, matches, wins, total in ENTRY.iter_unpack(
+                data[TABLE_OFFSET:TABLE_OFFSET + count * ENTRY.size]):
+            name = name.rstrip(b"\0").decode()
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.ratings.append(rating)
+            self.matches.append(matches)
+            self.wins.append(wins)
+            self.totals.append(total)
+
+    def entrant(self, name: str) -> int:
+        # Row of a strategy, added at the initial rating on its first match
+        row = self.index.get(name)
+        if row is None:
+            if len(name.encode()) > NAME_BYTES:
+                raise ValueError(f"Strategy name {name!r} is longer than {NAME_BYTES} bytes")
+            row = self.index[name] = len(self.names)
+            self.names.append(name)
+            self.ratings.append(INITIAL_RATING)
+            self.matches.append(0)
+            self.wins.append(0.0)
+            self.totals.append(0)
+        return row
+
+    def record_match(self, names: list[str], totals: list[int]):
+        # Rate one finished match from each seat's final total (lowest wins): every pair
+        # of seats is an Elo game, with K shared between the pairings of a seat
+        rows = [self.entrant(name) for name in names]
+        ratings = self.ratings
+        k = self.k / (len(rows) - 1)
+        changes = [0.0] * len(rows)
+        for i in range(len(rows)):
+            for j in range(i + 1, len(rows)):
+                expected = 1.0 / (1.0 + 10.0 ** ((ratings[rows[j]] - ratings[rows[i]]) / 400.0))
+                result = 1.0 if totals[i] < totals[j] else 0.5 if totals[i] == totals[j] else 0.0
+                change = k * (result - expected)
+                changes[i] += change
+                changes[j] -= change
+
+        best = min(totals)
+        winners = totals.count(best)
+        for row, change, total in zip(rows, changes, totals):
+            ratings[row] += change
+            self.matches[row] += 1
+            self.totals[row] += total
+            if total == best:
+                self.wins[row] += 1.0 / winners
+            self.dirty.add(row)
+        self.matches_rated += 1
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        # Write the header and the changed rows, one write per run of consecutive rows
+        file = self.file
+        file.seek(len(LEAGUE_MAGIC))
+        file.write(LEAGUE_HEADER.pack(self.matches_rated, len(self.names)))
+        rows = sorted(self.dirty)
+        start = 0
+        while start < len(rows):
+            stop = start + 1
+            while stop < len(rows) and rows[stop] == rows[stop - 1] + 1:
+                stop += 1
+            file.seek(TABLE_OFFSET + rows[start] * ENTRY.size)
+            file.write(b"".join(self._pack(row) for row in rows[start:stop]))
+            start = stop
+        file.flush()
+        self.dirty.clear()
+        self.unflushed = 0
+
+    def _pack(self, row: int) -> bytes:
+        return ENTRY.pack(self.names[row].encode(), self.ratings[row], self.matches[row],
+                          self.wins[row], self.totals[row])
+
+    def standing(self, row: int) -> Standing:
+        matches = self.matches[row]
+        return Standing(self.names[row], self.ratings[row], matches, self.wins[row],
+                        self.totals[row] / matches if matches else 0.0)
+
+    def leaderboard(self, top: Optional[int] = None) -> list[Standing]:
+        # Strategies by rating, best first (only the top rows are sorted when given)
+        rows = range(len(self.names))
+        if top is None:
+            ordered = sorted(rows, key=self.ratings.__getitem__, reverse=True)
+        else:
+            ordered = heapq.nlargest(top, rows, key=self.ratings.__getitem__)
+        return [self.standing(row) for row in ordered]
+
+    def summary(self, top: Optional[int] = None) -> str:
+        lines = [f"{self.matches_rated} matches, {len(self.names)} strategies"]
+        for rank, standing in enumerate(self.leaderboard(top), 1):
+            lines.append(f"{rank:4}. {standing.name:<20} {standing.rating:7.1f}  "
+                         f"{standing.matches:>9} matches  win rate {standing.wins / standing.matches:6.1%}  "
+                         f"mean total {standing.mean_total:6.1f}")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> League:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ---------- Simulation ----------
+
+def play_match(strategies: list[str], seed: int, target: int = MATCH_TARGET) -> list[int]:
+    # Play one match between bots of the given strategies; returns the final totals
+    game = Game([create_bot(strategy, f"{strategy}#{i}") for i, strategy in enumerate(strategies)], seed=seed)
+    game.start_game()
+    return game.play_match(target)
+
+
+def play_matches(task: tuple) -> list[tuple[list[str], list[int]]]:
+    # Worker entry point: play matches [start, stop), each between seats strategies
+    # drawn from the pool by the match's own seed
+    pool, seats, base_seed, start, stop, target = task
+    results = []
+    for match_id in range(start, stop):
+        seed = game_seed(base_seed, match_id)
+        strategies = random.Random(seed).sample(pool, seats)
+        results.append((strategies, play_match(strategies, seed, target)))
+    return results
+
+
+def _chunks(pool: list[str], seats: int, base_seed: int, start: int, stop: int,
+            chunk_size: int, target: int) -> Iterator[tuple]:
+    for first in range(start, stop, chunk_size):
+        yield pool, seats, base_seed, first, min(first + chunk_size, stop), target
+
+
+def run_league(league: League, pool: list[str], num_matches: int, seats: int = 2,
+               base_seed: int = 0, workers: Optional[int] = 1,
+               chunk_size: int = DEFAULT_CHUNK_MATCHES, target: int = MATCH_TARGET):
+    # Play num_matches more matches and rate them as they stream in. Match ids continue
+    # from the matches already rated, and chunks are rated in order, so a league grown
+    # over several runs is the same whatever the worker count.
+    # workers=1 plays in-process; None uses one worker per CPU core
+    validate_strategies(pool)
+    if not 2 <= seats <= len(pool):
+        raise ValueError(f"A match needs 2 to {len(pool)} seats from this pool, not {seats}")
+
+    start = league.matches_rated
+    tasks = _chunks(pool, seats, base_seed, start, start + num_matches, chunk_size, target)
+    if workers == 1 or num_matches <= chunk_size:
+        _rate(league, map(play_matches, tasks))
+    else:
+        from multiprocessing import Pool
+        with Pool(processes=workers) as processes:
+            _rate(league, processes.imap(play_matches, tasks))
+    league.flush()
+
+
+def _rate(league: League, chunks: Iterable[list[tuple[list[str], list[int]]]]):
+    for chunk in chunks:
+        for strategies, totals in chunk:
+            league.record_match(strategies, totals)
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Elo league of Skyjo strategies over simulated matches")
+    parser.add_argument("league", help="league file (created if missing)")
+    parser.add_argument("-n", "--matches", type=int, default=0, help="matches to play before showing the table")
+    parser.add_argument("-p", "--pool", nargs="+", choices=sorted(BOTS), default=["random", "greedy", "ev"],
+                        help="strategies drawn into the matches")
+    parser.add_argument("--seats", type=int, default=2, help="players per match")
+    parser.add_argument("--target", type=int, default=MATCH_TARGET, help="points that end a match")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="base seed")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_MATCHES)
+    parser.add_argument("-k", type=float, default=DEFAULT_K, help="Elo K factor")
+    parser.add_argument("--top", type=int, default=None, help="show only the best strategies")
+    args = parser.parse_args(argv)
+
+    with League(args.league, args.k) as league:
+        if args.matches:
+            run_league(league, args.pool, args.matches, args.seats, args.seed, args.workers,
+                       args.chunk_size, args.target)
+        print(league.summary(args.top))
+
+
+if __name__ == "__main__":
+    main()
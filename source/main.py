@@ -1,21 +1,105 @@
 # main.py
-from game import Game
-from gui import GameWindow
+import argparse
+import importlib
+import sys
+from typing import Optional
 
-def main():
-    # Define the list of players taking part in the game
-    player_names = ["Alice", "Bob"]
+# Subcommands implemented by the main() of another module: name -> (module, help).
+# A module is only imported when its subcommand runs, so batch commands never load
+# tkinter, and only the commands that need them load NumPy or multiprocessing.
+SUBCOMMANDS = {
+    "simulate": ("tournament", "play a bot tournament (simulate --help for options)"),
+    "compare": ("compare", "compare two bots, stopping once the result is significant"),
+    "league": ("league", "Elo league of bots over simulated matches to 100 points"),
+    "bench": ("benchmark", "benchmark the engine hot paths"),
+    "replay": ("records", "list recorded games or replay them move by move"),
+    "analyze": ("analytics", "statistics over recorded games"),
+    "serve": ("server", "run the multiplayer table server"),
+}
 
-    # Create the Game instance with all players
-    game = Game(player_names)
+
+def positive_int(text: str) -> int:
+    # argparse type for counts that must be at least 1
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text}")
+    return value
+
+
+# Seats a game can have (the window lays out any number in between)
+MIN_PLAYERS = 2
+MAX_PLAYERS = 8
+
+
+def seat_entry(text: str) -> str:
+    # argparse type for a seat: NAME, or NAME=STRATEGY with a registered bot strategy
+    _, _, strategy = text.partition("=")
+    if strategy:
+        from bots import BOTS, validate_strategies
+        try:
+            validate_strategies((strategy,))
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"unknown strategy {strategy!r} in {text!r}, expected one of {sorted(BOTS)}") from None
+    return text
+
+
+def play(args: argparse.Namespace):
+    # Import the GUI only when a window is actually opened
+    from bots import create_bot
+    from game import Game
+    from gui import GameWindow
+
+    # Create the Game instance with all players; NAME=STRATEGY seats a bot
+    seats = []
+    for entry in args.players:
+        name, _, strategy = entry.partition("=")
+        seats.append(create_bot(strategy, name or strategy) if strategy else name)
+    game = Game(seats, seed=args.seed)
 
     # Initialize the first round (deal cards, set up discard pile)
     game.start_game()
 
+    # Optionally save every finished round as a game record
+    recorder = None
+    if args.record:
+        from records import RecordWriter
+        recorder = RecordWriter(args.record)
+
     # Create and display the GUI window bound to the game
-    window = GameWindow(game)
+    pace = {"move_delay": args.delay, "fps": args.fps}
+    window = GameWindow(game, recorder, **{key: value for key, value in pace.items() if value is not None})
     window.mainloop()  # Start GUI event loop
 
+
+def main(argv: Optional[list[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description="Skyjo: play in a window (default) or run batch tools")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    play_parser = commands.add_parser("play", help="play in a Tkinter window (the default)")
+    play_parser.add_argument("players", nargs="*", type=seat_entry, default=["Alice", "Bob"],
+                             help="player names; NAME=STRATEGY for a bot (only bots: watch them play)")
+    play_parser.add_argument("-s", "--seed", type=int, default=None, help="seed for the deals")
+    play_parser.add_argument("--record", metavar="DIR", help="save every finished round in DIR")
+    play_parser.add_argument("--delay", type=float, help="seconds between bot actions (default 0.4)")
+    play_parser.add_argument("--fps", type=positive_int, help="redraws per second when watching bots (default 30)")
+
+    for name, (_, help_text) in SUBCOMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    # The other commands hand all their arguments (including --help) to their module
+    if argv and argv[0] in SUBCOMMANDS:
+        module = importlib.import_module(SUBCOMMANDS[argv[0]][0])
+        module.main(argv[1:], prog=f"{parser.prog} {argv[0]}")
+        return
+    args = parser.parse_args(argv)
+    args = args if args.command else play_parser.parse_args([])
+    if not MIN_PLAYERS <= len(args.players) <= MAX_PLAYERS:
+        play_parser.error(f"a game has {MIN_PLAYERS} to {MAX_PLAYERS} players, not {len(args.players)}")
+    play(args)
+
+
 if __name__ == "__main__":
     # Entry point of the app
     main()
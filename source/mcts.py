@@ -0,0 +1,238 @@
+# mcts.py
+from __future__ import annotations
+import itertools
+import math
+import random
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from bots import BotPlayer, expected_value_action
+from deck import MIN_CARD_VALUE
+from endgame import canonical_columns, column_value, final_turn_action, pool_stats
+from game import Game, Action, CHOOSE_PILE, ROUND_OVER
+from player import GRID_SIZE
+from transposition import TranspositionTable
+
+# Default thinking time per decision, in seconds
+DEFAULT_TIME_BUDGET = 0.05
+# UCB exploration constant, on mean rewards rescaled to [0, 1] across a node's actions
+EXPLORATION = 0.7
+# Below the root a node searches 1 + WIDENING * sqrt(visits) of its actions
+WIDENING = 0.5
+# Turns played by the expected-value rollout policy before the position is scored
+# heuristically (None plays the round out)
+ROLLOUT_TURNS = None
+# The search overrides the expected-value policy only with an action whose mean reward
+# is higher by at least SWITCH_MARGIN standard errors of the difference
+SWITCH_MARGIN = 3.0
+# Information-set nodes kept by a bot between decisions
+TABLE_CAPACITY = 1 << 16
+
+
+class Node:
+    # Information-set node: statistics of every action of the player to move, in the order
+    # progressive widening adds them (the expected-value policy's choice first).
+    # Nodes live in a transposition table keyed by Game.public_hash(), which leaves
+    # face-down values out: every determinization of a public position shares its node,
+    # and so do positions reached by different move orders.
+    __slots__ = ("stats", "visits")
+
+    def __init__(self):
+        self.stats: dict[Action, list] = {}          # action -> [visits, reward sum, sum of squares], in widening order
+        self.visits = 0
+
+
+def lookup(table: TranspositionTable, world: Game) -> Node:
+    # Node of the public position of world, created on first visit
+    key = world.public_hash()
+    node = table.get(key)
+    if node is None:
+        node = Node()
+        table.store(key, node)
+    return node
+
+
+def determinize(game: Game, rng: random.Random) -> Game:
+    # Copy of the game where every face-down card (draw pile and hidden grid cells)
+    # is redrawn from the unseen-card pool: one world consistent with public information
+    world = game.copy()
+    pool = [MIN_CARD_VALUE + i for i, count in enumerate(world.unseen) for _ in range(count)]
+    rng.shuffle(pool)
+    for player in world.players:
+        hidden = player.hidden_mask()
+        for index in range(GRID_SIZE):
+            if hidden >> index & 1:
+                player.values[index] = pool.pop()
+        player.rehash()
+    world.deck.set_draw_pile(pool)
+    world.rng.seed(rng.getrandbits(64))
+    return world
+
+
+def estimate_scores(world: Game) -> list[float]:
+    # Expected final score of every grid if none of its cards changed any more: face-down
+    # cards come from the unseen pool and columns that can still become a triple count
+    # at their expected value (see endgame.column_value). Only public information is used.
+    if world.phase == ROUND_OVER:
+        return world.round_scores
+    stats = pool_stats(tuple(world.unseen))
+    return [sum(column_value(pattern, stats) for pattern in canonical_columns(player)[0])
+            for player in world.players]
+
+
+def rewards(scores: list[float]) -> list[float]:
+    # Reward of each seat: its lead in points over the average opponent
+    total = sum(scores)
+    others = len(scores) - 1 or 1
+    return [(total - score) / others - score for score in scores]
+
+
+def search(table: TranspositionTable, game: Game, deadline: float, rng: random.Random,
+           exploration: float = EXPLORATION) -> int:
+    # Single-observer IS-MCTS from the position of game until the deadline; returns the
+    # iteration count. Statistics accumulate in table.
+    iterations = 0
+    while time.perf_counter() < deadline:
+        world = determinize(game, rng)
+        root = node = lookup(table, world)
+        path = []
+        visited = set()
+
+        # Selection and expansion inside the tree; a position met again in the same
+        # iteration (a cycle of swaps) ends the selection
+        while world.phase != ROUND_OVER and id(node) not in visited:
+            visited.add(id(node))
+            actions = world.legal_actions()
+            stats = node.stats
+            if not stats:
+                # New node: the policy's action comes first in the widening order
+                stats[expected_value_action(world.get_current_player(), world)] = [0, 0.0, 0.0]
+            for action in actions:
+                if action not in stats:
+                    stats[action] = [0, 0.0, 0.0]
+            node.visits += 1
+
+            # Progressive widening: below the root, only the first legal actions of the order
+            # are searched, more of them as the node gathers visits (the node is shared by
+            # determinizations, so some of its actions may not be legal in this one)
+            legal = set(actions)
+            width = len(stats) if node is root else 1 + int(WIDENING * math.sqrt(node.visits))
+            candidates = list(itertools.islice((action for action in stats if action in legal), width))
+            assert candidates, f"no legal action in phase {world.phase}"
+            untried = next((action for action in candidates if not stats[action][0]), None)
+            if untried is not None:
+                action = untried
+            else:
+                # UCB on mean rewards rescaled to [0, 1] over the candidates
+                means = {a: stats[a][1] / stats[a][0] for a in candidates}
+                low = min(means.values())
+                span = max(means.values()) - low or 1.0
+                log_visits = math.log(node.visits)
+                action = max(candidates, key=lambda a: (means[a] - low) / span +
+                             exploration * math.sqrt(log_visits / stats[a][0]))
+
+            path.append((stats[action], world.current_player_index))
+            world.apply_action(action)
+            node = lookup(table, world)
+            if untried is not None:
+                break
+
+        # Rollout with the expected-value policy: finish the turn in progress (a held card
+        # is not counted by the estimate), play up to ROLLOUT_TURNS more turns, then score
+        extra = ROLLOUT_TURNS if ROLLOUT_TURNS is not None else math.inf
+        while world.phase != ROUND_OVER and (world.phase != CHOOSE_PILE or extra > 0):
+            if world.phase == CHOOSE_PILE:
+                extra -= 1
+            world.apply_action(expected_value_action(world.get_current_player(), world))
+
+        # Each node's statistics are from the point of view of the player who moved there
+        seat_rewards = rewards(estimate_scores(world))
+        for entry, mover in path:
+            entry[0] += 1
+            entry[1] += seat_rewards[mover]
+            entry[2] += seat_rewards[mover] ** 2
+        iterations += 1
+    return iterations
+
+
+def root_stats(table: TranspositionTable, game: Game) -> dict[Action, tuple[int, float, float]]:
+    # (visits, reward sum, sum of squared rewards) of every action searched from game
+    return {action: tuple(entry) for action, entry in lookup(table, game).stats.items()}
+
+
+def search_worker(game: Game, deadline: float, seed: int) -> dict[Action, tuple[int, float, float]]:
+    # Process pool entry point: independent search on a copy until deadline, a time.time()
+    # value (perf_counter has no common origin across processes); returns the root stats
+    table = TranspositionTable(TABLE_CAPACITY)
+    search(table, game, time.perf_counter() + deadline - time.time(), random.Random(seed))
+    return root_stats(table, game)
+
+
+class MonteCarloPlayer(BotPlayer):
+    # Information-set Monte Carlo tree search bot with a wall-clock budget per decision.
+    # Extra worker processes run independent searches (root parallelization) whose
+    # root statistics are merged with the in-process tree, whose table is kept between turns.
+    def __init__(self, name: str, time_budget: float = DEFAULT_TIME_BUDGET,
+                 workers: int = 0, seed: Optional[int] = None):
+        super().__init__(name)
+        self.time_budget = time_budget
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.table = TranspositionTable(TABLE_CAPACITY)
+        self.last_iterations = 0
+
+    def choose_action(self, game: Game) -> Action:
+        legal = game.legal_actions()
+        if len(legal) == 1:
+            return legal[0]
+        if game.final_round_triggered:
+            # The last turn is solved exactly, no search needed
+            return final_turn_action(self, game)
+
+        # One deadline for every search, however late a worker picks up its task
+        start = time.perf_counter()
+        deadline = time.time() + self.time_budget
+        futures: list[Future] = []
+        if self.workers:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            snapshot = game.copy()
+            futures = [self.executor.submit(search_worker, snapshot, deadline, self.rng.getrandbits(64))
+                       for _ in range(self.workers)]
+
+        self.last_iterations = search(self.table, game, start + self.time_budget, self.rng)
+        totals = root_stats(self.table, game)
+        for future in futures:
+            for action, stat in future.result().items():
+                old = totals.get(action, (0, 0.0, 0.0))
+                totals[action] = tuple(old_value + value for old_value, value in zip(old, stat))
+
+        # Mean reward and variance of that mean, for actions searched at least twice
+        def estimate(action: Action) -> tuple[float, float]:
+            visits, reward, squares = totals.get(action, (0, 0.0, 0.0))
+            if visits < 2:
+                return -math.inf, math.inf
+            mean = reward / visits
+            return mean, max(squares / visits - mean * mean, 0.0) / (visits - 1)
+
+        # Keep the policy's action unless the best searched one is clearly better
+        policy = expected_value_action(self, game)
+        best = max(legal, key=lambda action: estimate(action)[0])
+        policy_mean, policy_variance = estimate(policy)
+        best_mean, best_variance = estimate(best)
+        if best_mean - policy_mean > SWITCH_MARGIN * math.sqrt(policy_variance + best_variance):
+            return best
+        return policy
+
+    def close(self):
+        # Stop the worker processes
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __getstate__(self):
+        # Worker pools and search tables do not travel between processes
+        state = self.__dict__.copy()
+        state.update(executor=None, table=TranspositionTable(TABLE_CAPACITY))
+        return state
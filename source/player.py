@@ -1,99 +1,299 @@
 # player.py
 from __future__ import annotations
+import random
+from array import array
 from typing import Optional
-from card import Card
-from deck import Deck
+from card import Card, card_view
+from deck import Deck, MIN_CARD_VALUE, CARD_COUNTS
+
+GRID_ROWS = 3
+GRID_COLS = 4
+GRID_SIZE = GRID_ROWS * GRID_COLS
+FULL_MASK = (1 << GRID_SIZE) - 1
+# Bit mask of the three cells of each column (cell index = row * GRID_COLS + col)
+COLUMN_MASKS = [sum(1 << (row * GRID_COLS + col) for row in range(GRID_ROWS))
+                for col in range(GRID_COLS)]
+# Attributes making up a player's game state, copied by Player.copy()
+PLAYER_STATE_FIELDS = ("name", "values", "revealed_mask", "removed_mask", "score", "held_value",
+                       "revealed_sum", "hidden_count", "triple_columns", "zobrist", "hidden_zobrist")
+
+# Zobrist keys (fixed seed, so hashes are stable across runs and processes):
+# CELL_KEYS[index][value - MIN_CARD_VALUE] for a face-down card, the same offset by
+# NUM_VALUES for a face-up one; removed cells contribute nothing
+NUM_VALUES = len(CARD_COUNTS)
+_zobrist_rng = random.Random(0x5C1A0)
+CELL_KEYS = [[_zobrist_rng.getrandbits(64) for _ in range(2 * NUM_VALUES)] for _ in range(GRID_SIZE)]
+HELD_KEYS = [_zobrist_rng.getrandbits(64) for _ in range(NUM_VALUES)]
+# The public hash keys a face-down cell by FACE_DOWN_KEYS[index] whatever its value;
+# HIDDEN_KEYS[index][value - MIN_CARD_VALUE] turns the full key into that one
+FACE_DOWN_KEYS = [_zobrist_rng.getrandbits(64) for _ in range(GRID_SIZE)]
+HIDDEN_KEYS = [[keys[offset] ^ face_down for offset in range(NUM_VALUES)]
+               for keys, face_down in zip(CELL_KEYS, FACE_DOWN_KEYS)]
+
 
 class Player:
+    # While journal is set (Game.make_move), every grid mutation logs its inverse there
+    journal: Optional[list] = None
+
     def __init__(self, name: str):
         self.name = name
-        self.grid: list[list[Optional[Card]]] = []   # 3×4 grid holding the player's cards
-        self.score: int = 0                          # Total score after each round
-        self.held_card: Optional[Card] = None        # Card temporarily held during a turn
+        self.values = array("b", bytes(GRID_SIZE))    # Card value of each grid cell, row-major
+        self.revealed_mask: int = 0                   # Bit set when the cell's card is face-up
+        self.removed_mask: int = FULL_MASK            # Bit set when the cell is empty (no card)
+        self.score: int = 0                           # Total score after each round
+        self.held_value: Optional[int] = None         # Card temporarily held during a turn
+
+        # Running totals kept up to date by every grid mutation
+        self.revealed_sum: int = 0                    # Sum of the face-up card values
+        self.hidden_count: int = 0                    # Number of face-down cards left
+        self.triple_columns: int = 0                  # Bit set for each column of 3 equal face-up cards
+        self.zobrist: int = 0                         # Hash of the grid cells and the held card
+        self.hidden_zobrist: int = 0                  # HIDDEN_KEYS of the face-down cells
+
+    def copy(self) -> Player:
+        # Plain Player with an independent copy of this player's state
+        # (bot-specific attributes such as search trees or worker pools are left behind)
+        clone = Player.__new__(Player)
+        for field in PLAYER_STATE_FIELDS:
+            setattr(clone, field, getattr(self, field))
+        clone.values = array("b", self.values)
+        return clone
+
+    @property
+    def grid(self) -> list[list[Optional[Card]]]:
+        # 3×4 grid of shared Card views of the compact state (None for empty cells)
+        grid = []
+        for row in range(GRID_ROWS):
+            cards = []
+            for col in range(GRID_COLS):
+                index = row * GRID_COLS + col
+                if self.removed_mask >> index & 1:
+                    cards.append(None)
+                    continue
+                cards.append(card_view(self.values[index], bool(self.revealed_mask >> index & 1)))
+            grid.append(cards)
+        return grid
+
+    @property
+    def held_card(self) -> Optional[Card]:
+        # Shared Card view of the held value (drawn cards are always face-up)
+        return card_view(self.held_value)
+
+    @held_card.setter
+    def held_card(self, card: Optional[Card]):
+        self._set_held(card.value if card is not None else None)
+
+    def _save(self, index: int = -1):
+        # Journal the state this mutation is about to change (plus one cell's value)
+        self.journal.append((self, index, self.values[index] if index >= 0 else 0,
+                             self.revealed_mask, self.removed_mask, self.held_value, self.score,
+                             self.revealed_sum, self.hidden_count, self.triple_columns, self.zobrist,
+                             self.hidden_zobrist))
+
+    def undo(self, entry: tuple):
+        # Restore the state saved by _save()
+        (_, index, value, self.revealed_mask, self.removed_mask, self.held_value, self.score,
+         self.revealed_sum, self.hidden_count, self.triple_columns, self.zobrist,
+         self.hidden_zobrist) = entry
+        if index >= 0:
+            self.values[index] = value
+
+    def _set_held(self, value: Optional[int]):
+        # Change the held value, keeping the hash up to date
+        if self.journal is not None:
+            self._save()
+        if self.held_value is not None:
+            self.zobrist ^= HELD_KEYS[self.held_value - MIN_CARD_VALUE]
+        if value is not None:
+            self.zobrist ^= HELD_KEYS[value - MIN_CARD_VALUE]
+        self.held_value = value
+
+    @property
+    def public_zobrist(self) -> int:
+        # Hash of what every player can see: face-down cells count whatever their value
+        return self.zobrist ^ self.hidden_zobrist
+
+    def rehash(self) -> int:
+        # Recompute the hashes from scratch (after editing values directly, e.g. in search)
+        zobrist = hidden = 0
+        for index in range(GRID_SIZE):
+            if not self.removed_mask >> index & 1:
+                offset = self.values[index] - MIN_CARD_VALUE
+                if self.revealed_mask >> index & 1:
+                    zobrist ^= CELL_KEYS[index][NUM_VALUES + offset]
+                else:
+                    zobrist ^= CELL_KEYS[index][offset]
+                    hidden ^= HIDDEN_KEYS[index][offset]
+        if self.held_value is not None:
+            zobrist ^= HELD_KEYS[self.held_value - MIN_CARD_VALUE]
+        self.zobrist = zobrist
+        self.hidden_zobrist = hidden
+        return zobrist
 
     def setup_grid(self, deck: Deck):
         # Deal 12 face-down cards into a 3×4 grid
-        self.grid = [[deck.draw_card() for _ in range(4)] for _ in range(3)]
+        for index in range(GRID_SIZE):
+            self.values[index] = deck.draw_value()
+        self.revealed_mask = 0
+        self.removed_mask = 0
+        self.revealed_sum = 0
+        self.hidden_count = GRID_SIZE
+        self.triple_columns = 0
+        self.rehash()
+
+    def _update_column(self, col: int):
+        # Recompute the match state of the only column touched by a move
+        column_mask = COLUMN_MASKS[col]
+        values = self.values
+        value = values[col]
+        if (self.revealed_mask & column_mask == column_mask
+                and values[col + GRID_COLS] == value and values[col + 2 * GRID_COLS] == value):
+            self.triple_columns |= 1 << col
+        else:
+            self.triple_columns &= ~(1 << col)
 
     def reveal_card(self, row: int, col: int) -> bool:
         # Reveal a specific card if it is still hidden
-        card = self.grid[row][col]
-        if card and not card.revealed:
-            card.reveal()
-            return True
-        return False
+        index = row * GRID_COLS + col
+        bit = 1 << index
+        if (self.revealed_mask | self.removed_mask) & bit:
+            return False
+        if self.journal is not None:
+            self._save()
+        self.revealed_mask |= bit
+        value = self.values[index]
+        self.revealed_sum += value
+        self.hidden_count -= 1
+        self.zobrist ^= (CELL_KEYS[index][value - MIN_CARD_VALUE] ^
+                         CELL_KEYS[index][NUM_VALUES + value - MIN_CARD_VALUE])
+        self.hidden_zobrist ^= HIDDEN_KEYS[index][value - MIN_CARD_VALUE]
+        self._update_column(col)
+        return True
 
     def draw_from_deck(self, deck: Deck) -> Optional[Card]:
         # Draw a card from the deck if the player is not already holding one
-        if self.held_card is None:
-            self.held_card = deck.draw_card()
+        if self.held_value is None:
+            self._set_held(deck.draw_value())
         return self.held_card
 
     def draw_from_discard(self, deck: Deck) -> Optional[Card]:
         # Take the top card from the discard pile if available
-        if self.held_card is None and deck.discard_pile:
-            self.held_card = deck.discard_pile.pop()
+        if self.held_value is None and deck.discard_pile:
+            self._set_held(deck.discard_pile.pop())
         return self.held_card
 
     def replace_card(self, row: int, col: int, deck: Deck) -> bool:
         # Replace a grid card using the held card, sending the old one to the discard pile
-        if self.held_card is None:
+        if self.held_value is None:
             return False
-        target_card = self.grid[row][col]
-        if target_card is not None:
-            target_card.reveal()              # Reveal replaced card before discarding
-            deck.discard_card(target_card)    # Old card goes to the discard pile
-        self.grid[row][col] = self.held_card  # Insert the held card
-        self.grid[row][col].reveal()          # New card becomes revealed
-        self.held_card = None
+        index = row * GRID_COLS + col
+        bit = 1 << index
+        if self.journal is not None:
+            self._save(index)
+        keys = CELL_KEYS[index]
+        held = self.held_value
+        if not self.removed_mask & bit:
+            old_value = self.values[index]
+            deck.discard_value(old_value)           # Old card goes to the discard pile
+            if self.revealed_mask & bit:
+                self.revealed_sum -= old_value
+                self.zobrist ^= keys[NUM_VALUES + old_value - MIN_CARD_VALUE]
+            else:
+                self.hidden_count -= 1
+                self.zobrist ^= keys[old_value - MIN_CARD_VALUE]
+                self.hidden_zobrist ^= HIDDEN_KEYS[index][old_value - MIN_CARD_VALUE]
+        self.values[index] = held                   # Insert the held card
+        self.revealed_mask |= bit                   # New card becomes revealed
+        self.removed_mask &= ~bit
+        self.revealed_sum += held
+        self.zobrist ^= keys[NUM_VALUES + held - MIN_CARD_VALUE] ^ HELD_KEYS[held - MIN_CARD_VALUE]
+        self.held_value = None
+        self._update_column(col)
         return True
 
     def discard_drawn_card(self, deck: Deck) -> bool:
         # Discard the currently held card without replacing any grid card
-        if self.held_card is None:
+        if self.held_value is None:
             return False
-        deck.discard_card(self.held_card)
-        self.held_card = None
+        deck.discard_value(self.held_value)
+        self._set_held(None)
         return True
 
     def reveal_instead_of_replace(self, row: int, col: int) -> bool:
         # Reveal a card when the drawn card was discarded (special rule)
-        if self.held_card is not None:
+        if self.held_value is not None:
             return False
         return self.reveal_card(row, col)
 
+    def reveal_all_cards(self):
+        # Turn every remaining card face-up (end of round)
+        hidden = self.hidden_mask()
+        if not hidden:
+            return
+        if self.journal is not None:
+            self._save()
+        for index in range(GRID_SIZE):
+            if hidden >> index & 1:
+                value = self.values[index]
+                self.revealed_sum += value
+                self.zobrist ^= (CELL_KEYS[index][value - MIN_CARD_VALUE] ^
+                                 CELL_KEYS[index][NUM_VALUES + value - MIN_CARD_VALUE])
+        self.revealed_mask |= hidden
+        self.hidden_count = 0
+        self.hidden_zobrist = 0
+        for col in range(GRID_COLS):
+            self._update_column(col)
+
     def calculate_score(self) -> int:
-        # Compute the player's score by summing all revealed card values
-        total = 0
-        for row in self.grid:
-            for card in row:
-                if card and card.revealed:
-                    total += card.value
+        # Add the running sum of revealed card values to the player's score
+        total = self.revealed_sum
+        if self.journal is not None:
+            self._save()
         self.score += total
         return total
 
+    def hidden_mask(self) -> int:
+        # Bit mask of the cells still holding a face-down card
+        return FULL_MASK & ~(self.revealed_mask | self.removed_mask)
+
+    def first_hidden_index(self) -> int:
+        # Cell index of the first face-down card, or -1 if there is none
+        hidden = self.hidden_mask()
+        return (hidden & -hidden).bit_length() - 1
+
+    def highest_revealed_index(self) -> int:
+        # Cell index of the highest face-up card (first one on ties), or -1
+        best, best_value = -1, None
+        visible = self.revealed_mask & ~self.removed_mask
+        for index in range(GRID_SIZE):
+            if visible >> index & 1 and (best_value is None or self.values[index] > best_value):
+                best, best_value = index, self.values[index]
+        return best
+
     def all_cards_revealed(self) -> bool:
         # Check whether the player has no hidden cards left
-        return all(card.revealed for row in self.grid for card in row if card is not None)
+        return self.hidden_count == 0
 
     def check_triple_columns(self, discard_pile) -> list[str]:
-        # Detect columns containing 3 identical revealed cards
+        # Remove columns containing 3 identical revealed cards
+        # The match state is maintained by each move, so this is O(1) when nothing matches
         messages = []
-        for col in range(4):
-            column_cards = [self.grid[row][col] for row in range(3)]
-            # Column must contain only revealed cards
-            if all(card and card.revealed for card in column_cards):
-                values = [card.value for card in column_cards]
-                # All three cards must match
-                if len(set(values)) == 1:
-                    value = values[0]
-                    # Send all three cards to the *bottom* of the discard pile
-                    for card in column_cards:
-                        discard_pile.insert(0, card)
-                    # Remove the entire column from the grid
-                    for row in range(3):
-                        self.grid[row][col] = None
-                    messages.append(f"{self.name} eliminated a column of 3 cards {value}!")
+        if self.triple_columns and self.journal is not None:
+            self._save()
+        while self.triple_columns:
+            col = (self.triple_columns & -self.triple_columns).bit_length() - 1
+            column_mask = COLUMN_MASKS[col]
+            value = self.values[col]
+            # Send all three cards to the *bottom* of the discard pile
+            for row in range(GRID_ROWS):
+                discard_pile.appendleft(value)
+                self.zobrist ^= CELL_KEYS[col + row * GRID_COLS][NUM_VALUES + value - MIN_CARD_VALUE]
+            # Remove the entire column from the grid
+            self.revealed_mask &= ~column_mask
+            self.removed_mask |= column_mask
+            self.revealed_sum -= GRID_ROWS * value
+            self.triple_columns &= ~(1 << col)
+            messages.append(f"{self.name} eliminated a column of 3 cards {value}!")
         return messages
 
     def __repr__(self) -> str:
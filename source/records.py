@@ -0,0 +1,372 @@
+# records.py
+from __future__ import annotations
+import argparse
+import bisect
+import mmap
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+from deck import DECK_SIZE
+from player import GRID_COLS, GRID_SIZE
+from game import (
+    Game, Action, DRAW_DECK, DRAW_DISCARD, DISCARD, REPLACE, REVEAL,
+    DRAW_DECK_ACTION, DRAW_DISCARD_ACTION, DISCARD_ACTION, REVEAL_ACTIONS, REPLACE_ACTIONS
+)
+
+# Segment file layout:
+#   SEGMENT_MAGIC, then records back to back. Each record is RECORD_HEADER
+#   (game id, seed, flags, players, first player, length of the action stream),
+#   the deck order at the start of the round (DECK_SIZE bytes) when FLAG_DEAL_ORDER
+#   is set, then the action stream: one byte per action (kind << 4 | cell index).
+#   A RESHUFFLE_CODE byte, a count byte and that many card values give the new
+#   draw pile (top card last) ahead of the deck draw that caused the reshuffle.
+# The sidecar index file holds INDEX_ENTRY (game id, record offset) pairs sorted by id.
+SEGMENT_MAGIC = b"SKYJREC1"
+SEGMENT_SUFFIX = ".rec"
+INDEX_SUFFIX = ".idx"
+RECORD_HEADER = struct.Struct("<QQBBBH")
+INDEX_ENTRY = struct.Struct("<QQ")
+FLAG_DEAL_ORDER = 1
+RESHUFFLE_CODE = 0xFF
+# A writer starts a new segment once the current one grows past this size
+DEFAULT_SEGMENT_BYTES = 64 << 20
+
+# Action codes: kind in the high nibble, cell index in the low nibble
+KIND_CODES = {REVEAL: 0, DRAW_DECK: 1, DRAW_DISCARD: 2, REPLACE: 3, DISCARD: 4}
+ACTIONS_BY_CODE: list[Optional[Action]] = [None] * 256
+for _cell in range(GRID_SIZE):
+    ACTIONS_BY_CODE[KIND_CODES[REVEAL] << 4 | _cell] = REVEAL_ACTIONS[_cell]
+    ACTIONS_BY_CODE[KIND_CODES[REPLACE] << 4 | _cell] = REPLACE_ACTIONS[_cell]
+ACTIONS_BY_CODE[KIND_CODES[DRAW_DECK] << 4] = DRAW_DECK_ACTION
+ACTIONS_BY_CODE[KIND_CODES[DRAW_DISCARD] << 4] = DRAW_DISCARD_ACTION
+ACTIONS_BY_CODE[KIND_CODES[DISCARD] << 4] = DISCARD_ACTION
+
+
+class GameRecord(NamedTuple):
+    # One recorded round: enough to rebuild every position with Game
+    game_id: int
+    seed: Optional[int]             # Game seed, when it alone reproduces the deal
+    num_players: int
+    first_player: int               # Seat that starts the initial reveals
+    deal_order: Optional[bytes]     # Deck order at the start of the round, when not seeded
+    actions: bytes                  # Encoded action stream
+
+
+# ---------- Encoding ----------
+
+def encode_action(action: Action) -> int:
+    # Single-byte code of an action
+    cell = action.row * GRID_COLS + action.col if action.row >= 0 else 0
+    return KIND_CODES[action.kind] << 4 | cell
+
+
+def encode_game(game: Game, game_id: int) -> bytes:
+    # Serialize the current round of a game (normally a finished one) as one record
+    # The seed stands in for the deck order only on the first round of a seeded game
+    seeded = game.seed is not None and game.round_number == 1 and 0 <= game.seed < 1 << 64
+    stream = bytearray()
+    reshuffles = iter(game.reshuffle_log)
+    pending = next(reshuffles, None)
+    for position, (action, _) in enumerate(game.history):
+        if pending is not None and pending[0] == position:
+            stream.append(RESHUFFLE_CODE)
+            stream.append(len(pending[1]))
+            stream += pending[1]
+            pending = next(reshuffles, None)
+        stream.append(encode_action(action))
+
+    header = RECORD_HEADER.pack(game_id, game.seed if seeded else 0,
+                                0 if seeded else FLAG_DEAL_ORDER,
+                                len(game.players), game.first_player_index, len(stream))
+    return b"".join((header, b"" if seeded else game.deal_order, stream))
+
+
+def decode_record(buffer, offset: int) -> tuple[GameRecord, int]:
+    # Parse the record starting at offset; returns it with the offset of the next one
+    game_id, seed, flags, num_players, first_player, length = RECORD_HEADER.unpack_from(buffer, offset)
+    offset += RECORD_HEADER.size
+    deal_order = None
+    if flags & FLAG_DEAL_ORDER:
+        deal_order = bytes(buffer[offset:offset + DECK_SIZE])
+        offset += DECK_SIZE
+    actions = bytes(buffer[offset:offset + length])
+    record = GameRecord(game_id, None if deal_order is not None else seed,
+                        num_players, first_player, deal_order, actions)
+    return record, offset + length
+
+
+def decode_actions(actions: bytes) -> Iterator[tuple[Action, Optional[bytes]]]:
+    # Decode an action stream into (action, reshuffled draw pile or None) pairs
+    position = 0
+    pile = None
+    while position < len(actions):
+        code = actions[position]
+        if code == RESHUFFLE_CODE:
+            count = actions[position + 1]
+            pile = actions[position + 2:position + 2 + count]
+            position += 2 + count
+            continue
+        action = ACTIONS_BY_CODE[code]
+        if action is None:
+            raise ValueError(f"Invalid action code {code:#04x} in game record")
+        yield action, pile
+        pile = None
+        position += 1
+
+
+# ---------- Replay ----------
+
+def new_game(record: GameRecord, players: Optional[list] = None) -> Game:
+    # Game dealt exactly as at the start of the recorded round
+    players = players or [f"Player {i + 1}" for i in range(record.num_players)]
+    game = Game(players, seed=record.seed)
+    if record.deal_order is not None:
+        game.deck.set_draw_pile(array("b", record.deal_order))
+    game.current_player_index = record.first_player
+    game.start_game()
+    return game
+
+
+def replay(record: GameRecord, players: Optional[list] = None) -> Iterator[tuple[Game, Action]]:
+    # Play the recorded round again, yielding the game after each action
+    # (the same Game object every time, so copy it to keep a position)
+    return replay_actions(new_game(record, players), record)
+
+
+def replay_actions(game: Game, record: GameRecord) -> Iterator[tuple[Game, Action]]:
+    # Apply the recorded actions to a game set up by new_game()
+    for action, pile in decode_actions(record.actions):
+        if pile is not None:
+            # Recreate the recorded reshuffle instead of drawing on the generator
+            game.deck.reshuffle_discard()
+            game.deck.set_draw_pile(array("b", pile))
+            game.count_unseen()
+            game.reshuffle_log.append((len(game.history), pile))
+        if not game.apply_action(action):
+            raise ValueError(f"Game record {record.game_id} has an illegal {action.kind} action")
+        yield game, action
+
+
+def replay_game(record: GameRecord, players: Optional[list] = None) -> Game:
+    # Game at the end of the recorded round
+    game = new_game(record, players)
+    for _ in replay_actions(game, record):
+        pass
+    return game
+
+
+# ---------- Segment files ----------
+
+class RecordWriter:
+    # Appends records to segment files in a directory, rolling over to a new segment
+    # past max_segment_bytes; each segment's index is written when it is closed
+    def __init__(self, directory: str | Path, prefix: str = "games",
+                 max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.file = None
+        self.path: Optional[Path] = None
+        self.offset = 0
+        self.index: list[tuple[int, int]] = []     # (game id, offset) of the open segment
+
+    def _open_segment(self):
+        # Existing segments are never reopened: start the next free segment number
+        numbers = [int(path.stem.rsplit("-", 1)[1]) for path in
+                   self.directory.glob(f"{self.prefix}-*{SEGMENT_SUFFIX}")
+                   if path.stem.rsplit("-", 1)[1].isdigit()]
+        self.path = self.directory / f"{self.prefix}-{max(numbers, default=-1) + 1:05d}{SEGMENT_SUFFIX}"
+        self.file = open(self.path, "xb")
+        self.file.write(SEGMENT_MAGIC)
+        self.offset = len(SEGMENT_MAGIC)
+        self.index = []
+
+    def write(self, game: Game, game_id: int):
+        # Record the current round of game
+        self.write_record(encode_game(game, game_id), game_id)
+
+    def write_record(self, data: bytes, game_id: int):
+        # Append an already encoded record
+        if self.file is None:
+            self._open_segment()
+        self.file.write(data)
+        self.index.append((game_id, self.offset))
+        self.offset += len(data)
+        if self.offset >= self.max_segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self):
+        # Flush the segment and write its sorted index next to it
+        self.file.close()
+        self.file = None
+        self.index.sort()
+        with open(self.path.with_suffix(INDEX_SUFFIX), "wb") as index_file:
+            index_file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in self.index))
+        self.index = []
+
+    def close(self):
+        if self.file is not None:
+            self._close_segment()
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Segment:
+    # Memory-mapped segment file: records are decoded lazily while iterating
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            self.map.close()
+            raise ValueError(f"{self.path} is not a game record segment")
+        self._ids: Optional[array] = None
+        self._offsets: Optional[array] = None
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        offset, end = len(SEGMENT_MAGIC), len(self.map)
+        while offset < end:
+            record, offset = decode_record(self.map, offset)
+            yield record
+
+    def _load_index(self):
+        # Read the sidecar index, or rebuild it by scanning if the writer never closed it
+        ids, offsets = array("Q"), array("Q")
+        index_path = self.path.with_suffix(INDEX_SUFFIX)
+        if index_path.exists():
+            for game_id, offset in INDEX_ENTRY.iter_unpack(index_path.read_bytes()):
+                ids.append(game_id)
+                offsets.append(offset)
+        else:
+            entries = []
+            offset, end = len(SEGMENT_MAGIC), len(self.map)
+            while offset < end:
+                entries.append((RECORD_HEADER.unpack_from(self.map, offset)[0], offset))
+                offset = decode_record(self.map, offset)[1]
+            for game_id, offset in sorted(entries):
+                ids.append(game_id)
+                offsets.append(offset)
+        self._ids, self._offsets = ids, offsets
+
+    def game_ids(self) -> array:
+        # Sorted ids of the games in this segment
+        if self._ids is None:
+            self._load_index()
+        return self._ids
+
+    def get(self, game_id: int) -> Optional[GameRecord]:
+        # Random access through the index (binary search)
+        ids = self.game_ids()
+        position = bisect.bisect_left(ids, game_id)
+        if position == len(ids) or ids[position] != game_id:
+            return None
+        return decode_record(self.map, self._offsets[position])[0]
+
+    def __len__(self) -> int:
+        return len(self.game_ids())
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self) -> Segment:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def segment_paths(source: str | Path | Iterable[str | Path]) -> list[Path]:
+    # Segment files of a directory (sorted), or the given paths
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        return sorted(path.glob(f"*{SEGMENT_SUFFIX}")) if path.is_dir() else [path]
+    return [Path(path) for path in source]
+
+
+class RecordReader:
+    # Lazy view over many segments: iteration maps one segment at a time, and random
+    # access by game id keeps the segments it has searched mapped until close()
+    def __init__(self, source: str | Path | Iterable[str | Path]):
+        self.paths = segment_paths(source)
+        self.segments: dict[Path, Segment] = {}
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for path in self.paths:
+            if path in self.segments:
+                yield from self.segments[path]
+                continue
+            with Segment(path) as segment:
+                yield from segment
+
+    def get(self, game_id: int) -> Optional[GameRecord]:
+        for path in self.paths:
+            segment = self.segments.get(path)
+            if segment is None:
+                segment = self.segments[path] = Segment(path)
+            record = segment.get(game_id)
+            if record is not None:
+                return record
+        return None
+
+    def __getitem__(self, game_id: int) -> GameRecord:
+        record = self.get(game_id)
+        if record is None:
+            raise KeyError(game_id)
+        return record
+
+    def close(self):
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+    def __enter__(self) -> RecordReader:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ---------- Command line ----------
+
+def describe_action(action: Action, shown: Optional[int]) -> str:
+    # One line of a replay log: the action, its cell and the card it made public
+    text = action.kind
+    if action.row >= 0:
+        text += f" row {action.row + 1} col {action.col + 1}"
+    return text if shown is None else f"{text} ({shown})"
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="List recorded Skyjo games or replay them")
+    parser.add_argument("records", nargs="+", help="segment files or directories of segments")
+    parser.add_argument("-g", "--game", type=int, action="append", metavar="ID",
+                        help="replay this game move by move (may be repeated)")
+    args = parser.parse_args(argv)
+
+    with RecordReader([path for source in args.records for path in segment_paths(source)]) as reader:
+        if not args.game:
+            for record in reader:
+                game = replay_game(record)
+                print(f"game {record.game_id}: {record.num_players} players, "
+                      f"{len(game.history)} actions, scores {game.round_scores}")
+            return
+
+        for game_id in args.game:
+            record = reader.get(game_id)
+            if record is None:
+                parser.error(f"no game {game_id} in {', '.join(args.records)}")
+            print(f"game {game_id}")
+            game = new_game(record)
+            seat = game.current_player_index
+            for _, action in replay_actions(game, record):
+                print(f"  {game.players[seat].name}: {describe_action(action, game.history[-1][1])}")
+                seat = game.current_player_index
+            for player in game.players:
+                print(player)
+            print(f"scores {game.round_scores}")
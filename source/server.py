@@ -0,0 +1,372 @@
+# server.py
+from __future__ import annotations
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Optional
+from events import GameEvent
+from game import Game, ROUND_OVER
+from player import GRID_SIZE
+from records import ACTIONS_BY_CODE, encode_action
+
+# Protocol: one JSON object per line in both directions.
+# Client -> server:
+#   {"op": "join", "name": str, "seats": 2-8, "table": id (optional)}
+#   {"op": "action", "code": int}        action code as in records.py (kind << 4 | cell)
+#   {"op": "state"}                       ask for a full state (e.g. to resync)
+#   {"op": "next_round"}                  start the next round once one is over
+# Server -> client:
+#   joined, state (full public view), diff (events since the previous message plus
+#   the turn state), turn (legal action codes, sent to the seat to move), error, closed
+MIN_SEATS = 2
+MAX_SEATS = 8
+# A client whose unsent output grows past this many bytes is disconnected
+MAX_CLIENT_BUFFER = 1 << 20
+# Pending connections the listening socket queues (bursts of joins arrive at once)
+BACKLOG = 4096
+# Longest message line a client may send; longer lines are dropped with an error
+MAX_LINE = 1 << 16
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+async def skip_line(reader: asyncio.StreamReader):
+    # Drop the rest of a line longer than the stream limit, chunk by chunk
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as exc:
+            await reader.readexactly(exc.consumed)
+
+
+class Seat:
+    # One connected client sitting at a table
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+        self.table: Optional[Table] = None
+        self.index = -1
+
+    def send(self, message: dict):
+        self.write(encode(message))
+
+    def write(self, line: bytes):
+        # Queue an encoded message without waiting; slow readers are dropped rather than buffered forever
+        if self.writer.is_closing():
+            return
+        self.writer.write(line)
+        if self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.writer.close()
+
+
+class Table:
+    # A game with 2-8 seats; starts when every seat is taken
+    def __init__(self, table_id: int, num_seats: int, seed: Optional[int] = None):
+        self.id = table_id
+        self.num_seats = num_seats
+        self.seed = seed
+        self.seats: list[Seat] = []
+        self.game: Optional[Game] = None
+        self.seq = 0                       # Number of diffs sent so far
+        self.events: list[list] = []       # Events gathered since the last diff
+
+    def full(self) -> bool:
+        return len(self.seats) == self.num_seats
+
+    def on_event(self, event: GameEvent):
+        # Game observer: events are the diff sent to every seat
+        self.events.append(list(event))
+
+    def start(self):
+        # Deal the first round once every seat is taken
+        self.game = Game([seat.name for seat in self.seats], seed=self.seed)
+        self.game.add_observer(self.on_event)
+        self.game.start_game()
+        self.broadcast_state()
+
+    def next_round(self):
+        self.game.reset_round()
+        self.events.clear()
+        self.broadcast_state()
+
+    def public_state(self) -> dict:
+        # Everything every seat may see: face-down values are left out
+        game = self.game
+        players = []
+        for player in game.players:
+            visible = player.revealed_mask & ~player.removed_mask
+            players.append({
+                "name": player.name,
+                "score": player.score,
+                "revealed": player.revealed_mask,
+                "removed": player.removed_mask,
+                "cells": [player.values[i] if visible >> i & 1 else None for i in range(GRID_SIZE)],
+                "held": player.held_value,
+            })
+        return {"op": "state", "table": self.id, "seq": self.seq, "players": players,
+                **self.turn_state()}
+
+    def turn_state(self) -> dict:
+        game = self.game
+        pile = game.discard_pile
+        return {"phase": game.phase, "turn": game.current_player_index,
+                "discard_top": pile[-1] if pile else None, "deck": game.deck.top,
+                "round_scores": game.round_scores if game.phase == ROUND_OVER else None}
+
+    def broadcast_state(self):
+        line = encode(self.public_state())
+        for seat in self.seats:
+            seat.write(line)
+        self.prompt()
+
+    def broadcast_diff(self):
+        # Send what changed: the events of the last action and the new turn state
+        self.seq += 1
+        # Encoded once and shared by every seat
+        line = encode({"op": "diff", "seq": self.seq, "events": self.events, **self.turn_state()})
+        self.events = []
+        for seat in self.seats:
+            seat.write(line)
+        self.prompt()
+
+    def prompt(self):
+        # Tell the seat to move which actions it may take
+        game = self.game
+        if game.phase != ROUND_OVER:
+            self.seats[game.current_player_index].send(
+                {"op": "turn", "legal": [encode_action(action) for action in game.legal_actions()]})
+
+    def play(self, seat: Seat, code: int) -> Optional[str]:
+        # Validate and apply an action; returns an error message or None
+        game = self.game
+        if game is None:
+            return "the table is still waiting for players"
+        if seat.index != game.current_player_index:
+            return "it is not your turn"
+        action = ACTIONS_BY_CODE[code] if isinstance(code, int) and 0 <= code < 256 else None
+        if action is None or not game.apply_action(action):
+            return f"illegal action {code!r} in phase {game.phase}"
+        self.broadcast_diff()
+        return None
+
+    def close(self, reason: str):
+        for seat in self.seats:
+            seat.send({"op": "closed", "reason": reason})
+            seat.table = None
+
+
+class TableServer:
+    # Hosts many independent tables; every connection is one seat
+    def __init__(self, seed: Optional[int] = None):
+        self.tables: dict[int, Table] = {}
+        self.waiting: dict[int, Table] = {}        # Seat count -> table still filling up
+        self.table_ids = itertools.count(1)
+        self.rng = random.Random(seed)
+        self.peak_tables = 0
+        self.actions_handled = 0
+        self.action_time = 0.0                      # Seconds spent handling actions
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        seat = Seat("?", writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as exc:
+                    line = exc.partial                  # Unterminated last line, or b"" at EOF
+                except asyncio.LimitOverrunError:
+                    await skip_line(reader)
+                    line = None
+                if line is None:
+                    error = f"bad message: longer than {MAX_LINE} bytes"
+                elif not line:
+                    break
+                else:
+                    try:
+                        message = json.loads(line)
+                        error = self.handle_message(seat, message)
+                    except (ValueError, TypeError, KeyError, OverflowError) as exc:
+                        error = f"bad message: {exc}"
+                if error:
+                    seat.send({"op": "error", "message": error})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.leave(seat)
+            writer.close()
+
+    def handle_message(self, seat: Seat, message: dict) -> Optional[str]:
+        # Dispatch one client message; returns an error message or None
+        op = message["op"]
+        if op == "action":
+            if seat.table is None:
+                return "join a table first"
+            start = time.perf_counter()
+            error = seat.table.play(seat, message["code"])
+            self.action_time += time.perf_counter() - start
+            self.actions_handled += 1
+            return error
+        if op == "join":
+            return self.join(seat, message)
+        if op == "state":
+            if seat.table is None or seat.table.game is None:
+                return "no game in progress"
+            seat.send(seat.table.public_state())
+            return None
+        if op == "next_round":
+            table = seat.table
+            if table is None or table.game is None or table.game.phase != ROUND_OVER:
+                return "the round is not over"
+            table.next_round()
+            return None
+        return f"unknown op {op!r}"
+
+    def join(self, seat: Seat, message: dict) -> Optional[str]:
+        # Sit at the requested table, or at the first one waiting for this many seats
+        if seat.table is not None:
+            return "already seated"
+        seat.name = str(message.get("name", "Player"))
+        num_seats = int(message.get("seats", MIN_SEATS))
+        if not MIN_SEATS <= num_seats <= MAX_SEATS:
+            return f"a table has {MIN_SEATS} to {MAX_SEATS} seats"
+
+        table_id = message.get("table")
+        if table_id is not None:
+            table = self.tables.get(table_id)
+            if table is None or table.full():
+                return f"table {table_id} is not open"
+        else:
+            table = self.waiting.get(num_seats)
+            if table is None:
+                table = Table(next(self.table_ids), num_seats, self.rng.getrandbits(64))
+                self.tables[table.id] = table
+                self.waiting[num_seats] = table
+                self.peak_tables = max(self.peak_tables, len(self.tables))
+
+        seat.table, seat.index = table, len(table.seats)
+        table.seats.append(seat)
+        seat.send({"op": "joined", "table": table.id, "seat": seat.index, "seats": table.num_seats})
+        if table.full():
+            if self.waiting.get(table.num_seats) is table:
+                del self.waiting[table.num_seats]
+            table.start()
+        return None
+
+    def leave(self, seat: Seat):
+        # A seat leaving closes its table (the game cannot go on without it)
+        table = seat.table
+        if table is None:
+            return
+        table.seats.remove(seat)
+        table.close(f"{seat.name} left")
+        self.tables.pop(table.id, None)
+        if self.waiting.get(table.num_seats) is table:
+            del self.waiting[table.num_seats]
+
+    def stats(self) -> str:
+        mean = self.action_time / self.actions_handled * 1e6 if self.actions_handled else 0.0
+        return (f"{len(self.tables)} tables (peak {self.peak_tables}), {self.actions_handled} actions, {mean:.1f} µs per action")
+
+
+async def serve(server: TableServer, host: str = "127.0.0.1", port: int = 8765,
+                unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+    # Listen on TCP, or on a Unix socket when unix_path is given
+    if unix_path is not None:
+        return await asyncio.start_unix_server(server.handle_client, path=unix_path,
+                                               backlog=BACKLOG, limit=MAX_LINE)
+    return await asyncio.start_server(server.handle_client, host, port, backlog=BACKLOG, limit=MAX_LINE)
+
+
+class Client:
+    # Minimal asyncio client, used for loopback tests and the demo below
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765,
+                      unix_path: Optional[str] = None) -> Client:
+        if unix_path is not None:
+            return cls(*await asyncio.open_unix_connection(unix_path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def send(self, message: dict):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self) -> Optional[dict]:
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def random_client(name: str, seats: int, rounds: int, rng: random.Random, **address):
+    # Loopback player: joins a table and plays random legal actions for a few rounds
+    client = await Client.connect(**address)
+    await client.send({"op": "join", "name": name, "seats": seats})
+    seat = -1
+    finished = 0
+    while finished < rounds:
+        message = await client.receive()
+        if message is None or message["op"] == "closed":
+            break
+        if message["op"] == "joined":
+            seat = message["seat"]
+        elif message["op"] == "turn":
+            await client.send({"op": "action", "code": rng.choice(message["legal"])})
+        elif message["op"] in ("diff", "state") and message["phase"] == ROUND_OVER:
+            finished += 1
+            if finished < rounds and seat == 0:
+                await client.send({"op": "next_round"})
+    await client.close()
+
+
+async def run_demo(tables: int, seats: int, rounds: int, seed: int, **address):
+    # Fill the server with loopback tables of random players and report handling time
+    server = TableServer(seed)
+    listener = await serve(server, **address)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    async with listener:
+        await asyncio.gather(*(random_client(f"bot{i}", seats, rounds, random.Random(rng.random()), **address)
+                               for i in range(tables * seats)))
+    elapsed = time.perf_counter() - start
+    print(f"{server.stats()}, {server.actions_handled / elapsed:,.0f} actions/s overall")
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Skyjo table server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed for table deals")
+    parser.add_argument("--demo", type=int, metavar="TABLES",
+                        help="play TABLES loopback tables of random clients, then exit")
+    parser.add_argument("--seats", type=int, default=2, help="seats per demo table")
+    parser.add_argument("--rounds", type=int, default=1, help="rounds per demo table")
+    args = parser.parse_args(argv)
+
+    address = {"unix_path": args.unix} if args.unix else {"host": args.host, "port": args.port}
+    if args.demo:
+        asyncio.run(run_demo(args.demo, args.seats, args.rounds, args.seed or 0, **address))
+        return
+
+    async def run():
+        listener = await serve(TableServer(args.seed), **address)
+        async with listener:
+            await listener.serve_forever()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
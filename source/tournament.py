@@ -0,0 +1,166 @@
+# tournament.py
+from __future__ import annotations
+import argparse
+import hashlib
+import math
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+from bots import BOTS, create_bot, validate_strategies
+from events import GameMetrics
+from game import Game
+from records import RecordWriter
+
+# Number of games a worker plays before streaming its results back
+DEFAULT_CHUNK_SIZE = 500
+
+
+def game_seed(base_seed: int, game_id: int) -> int:
+    # Independent, reproducible 64-bit seed for one game of a tournament
+    # (derived per game, so results do not depend on how games are split over workers)
+    digest = hashlib.blake2b(f"{base_seed}:{game_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def play_game(strategies: list[str], base_seed: int, game_id: int,
+              writer: Optional[RecordWriter] = None,
+              metrics: Optional[GameMetrics] = None) -> list[int]:
+    # Play one round and return the scores in strategy order
+    # Seats rotate with the game id so no strategy always moves first
+    n = len(strategies)
+    shift = game_id % n
+    seats = [(i + shift) % n for i in range(n)]
+    bots = [create_bot(strategies[i], f"{strategies[i]}#{i}") for i in seats]
+
+    game = Game(bots, seed=game_seed(base_seed, game_id))
+    if metrics is not None:
+        metrics.attach(game)
+    game.start_game()
+    seat_scores = game.play_round()
+    if writer is not None:
+        writer.write(game, game_id)
+
+    scores = [0] * n
+    for seat, index in enumerate(seats):
+        scores[index] = seat_scores[seat]
+    return scores
+
+
+def play_chunk(task: tuple) -> tuple[list[list[int]], Optional[GameMetrics]]:
+    # Worker entry point: play games [start, stop) and return their scores, plus the
+    # chunk's engine metrics when profiling
+    # When recording, each chunk gets its own segment files named after its first game,
+    # so the output does not depend on the number of workers
+    strategies, base_seed, start, stop, record_dir, profile = task
+    metrics = GameMetrics() if profile else None
+    if record_dir is None:
+        scores = [play_game(strategies, base_seed, game_id, metrics=metrics)
+                  for game_id in range(start, stop)]
+    else:
+        with RecordWriter(record_dir, prefix=f"games-{start:012d}") as writer:
+            scores = [play_game(strategies, base_seed, game_id, writer, metrics)
+                      for game_id in range(start, stop)]
+    return scores, metrics
+
+
+class TournamentStats:
+    # Running aggregate of tournament results; never stores individual games
+    def __init__(self, strategies: list[str]):
+        self.strategies = strategies
+        self.games = 0
+        self.wins = [0.0] * len(strategies)          # Ties share the win
+        self.score_sums = [0] * len(strategies)
+        self.score_squares = [0] * len(strategies)
+        self.score_counts = [Counter() for _ in strategies]  # Score distribution per strategy
+        self.metrics: Optional[GameMetrics] = None            # Engine profile, when requested
+
+    def add(self, scores: list[int]):
+        # Fold one game's scores into the running totals
+        self.games += 1
+        best = min(scores)
+        winners = [i for i, score in enumerate(scores) if score == best]
+        for i in winners:
+            self.wins[i] += 1 / len(winners)
+        for i, score in enumerate(scores):
+            self.score_sums[i] += score
+            self.score_squares[i] += score * score
+            self.score_counts[i][score] += 1
+
+    def win_rate(self, index: int) -> float:
+        return self.wins[index] / self.games if self.games else 0.0
+
+    def mean_score(self, index: int) -> float:
+        return self.score_sums[index] / self.games if self.games else 0.0
+
+    def score_stdev(self, index: int) -> float:
+        if self.games < 2:
+            return 0.0
+        mean = self.mean_score(index)
+        variance = (self.score_squares[index] - self.games * mean * mean) / (self.games - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def summary(self) -> str:
+        # Human-readable table of win rates and score statistics
+        lines = [f"{self.games} games"]
+        for i, strategy in enumerate(self.strategies):
+            lines.append(f"{i}: {strategy:<10} win rate {self.win_rate(i):6.1%}  "
+                         f"score {self.mean_score(i):6.2f} ± {self.score_stdev(i):.2f}")
+        if self.metrics is not None:
+            lines.append(self.metrics.summary())
+        return "\n".join(lines)
+
+
+def _chunks(strategies: list[str], num_games: int, base_seed: int, chunk_size: int,
+            record_dir: Optional[str], profile: bool) -> Iterator[tuple]:
+    for start in range(0, num_games, chunk_size):
+        yield strategies, base_seed, start, min(start + chunk_size, num_games), record_dir, profile
+
+
+def run_tournament(strategies: list[str], num_games: int, base_seed: int = 0,
+                   workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   record_dir: Optional[str] = None, profile: bool = False) -> TournamentStats:
+    # Play num_games rounds between the given strategies across a process pool
+    # workers=1 plays in-process; None uses one worker per CPU core. A tournament that
+    # fits in one chunk is always played in-process (a pool would only add start-up time)
+    # With record_dir, every game is saved as a binary record (see records.py);
+    # with profile, per-phase engine metrics are collected and merged (see events.py)
+    validate_strategies(strategies)
+
+    stats = TournamentStats(strategies)
+    tasks = _chunks(strategies, num_games, base_seed, chunk_size, record_dir, profile)
+    if workers == 1 or num_games <= chunk_size:
+        _fold(stats, map(play_chunk, tasks))
+    else:
+        from multiprocessing import Pool
+        with Pool(processes=workers) as pool:
+            _fold(stats, pool.imap_unordered(play_chunk, tasks))
+    return stats
+
+
+def _fold(stats: TournamentStats, results: Iterable[tuple[list[list[int]], Optional[GameMetrics]]]):
+    # Aggregate chunks as they stream in, then drop them
+    for chunk, metrics in results:
+        for scores in chunk:
+            stats.add(scores)
+        if metrics is not None:
+            stats.metrics = metrics if stats.metrics is None else stats.metrics.merge(metrics)
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None):
+    parser = argparse.ArgumentParser(prog=prog, description="Play a Skyjo bot tournament")
+    parser.add_argument("strategies", nargs="+", choices=sorted(BOTS), help="strategy of each seat")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="number of rounds to play")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="base seed")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--record", metavar="DIR", help="save every game to record segments in DIR")
+    parser.add_argument("--profile", action="store_true", help="report event counts and time per phase")
+    args = parser.parse_args(argv)
+
+    stats = run_tournament(args.strategies, args.games, args.seed, args.workers,
+                           args.chunk_size, args.record, args.profile)
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# transposition.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Default number of positions kept by a transposition table
+DEFAULT_CAPACITY = 1 << 20
+
+
+class TranspositionTable:
+    # Bounded cache of search results keyed by Game.zobrist_hash() (or public_hash() for
+    # information-set search), shared by bots and solvers
+    # Entries are (depth, value). Storing a position that is already known keeps the
+    # deeper result; when the table is full the least recently used entry is evicted.
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries: OrderedDict[int, tuple[int, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int, min_depth: int = 0) -> Optional[Any]:
+        # Value stored for key if it was searched at least min_depth deep, else None
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < min_depth:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def store(self, key: int, value: Any, depth: int = 0):
+        # Remember a result; a shallower one never replaces a deeper one (depth-preferred)
+        entries = self.entries
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+            if entry[0] > depth:
+                return
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+        entries[key] = (depth, value)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0